@@ -1,5 +1,5 @@
 from bson import ObjectId
-from fastapi import Request, BackgroundTasks, APIRouter, HTTPException, status, FastAPI, Depends
+from fastapi import Request, BackgroundTasks, APIRouter, HTTPException, status, Depends
 from app.utils.time import now_utc
 from app.models.actor import Actor
 from app.models.permission import Permission
@@ -8,19 +8,15 @@ from app.schemas.actor import AssignPermissionRequest, AssignPermissionResponse
 from app.schemas.permission import PermissionResponse
 from app.core.rate_limiter import limiter
 from bson.errors import InvalidId
-from slowapi.errors import RateLimitExceeded
-from slowapi import _rate_limit_exceeded_handler
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from app.logs.logging_config import logger
 from app.api.permissions import (
     CurrentUser,
     require_permission,
 )
+from app.core.security import invalidate_all_permissions
 
 router = APIRouter()
-app = FastAPI()
-
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 @router.post("/actor-permission",response_model=dict)
 @limiter.limit("5/minute")
@@ -64,7 +60,15 @@ async def assign_permission_to_actor(
             )
 
     if links:
-        await ActorPermission.insert_many(links)
+        try:
+            await ActorPermission.insert_many(links, ordered=False)
+        except BulkWriteError as e:
+            # A concurrent assign already created some links; anything else is a real failure
+            if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                raise
+        except DuplicateKeyError:
+            pass
+        await invalidate_all_permissions()
 
     background_tasks.add_task(
         logger.info,
@@ -112,6 +116,7 @@ async def unassign_permission_from_actor(
         "actor_id": actor.id,
         "permission_id": {"$in": perm_oids}
     }).delete()
+    await invalidate_all_permissions()
 
     background_tasks.add_task(
         logger.info,
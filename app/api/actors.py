@@ -1,22 +1,17 @@
 from bson import ObjectId
-from fastapi import Request, BackgroundTasks, APIRouter, HTTPException, status, FastAPI, Depends
-from app.utils.time import now_utc
+from fastapi import Request, BackgroundTasks, APIRouter, HTTPException, status, Depends
 from app.models.actor import Actor
 from app.schemas.actor import ActorCreate, ActorResponse, ActorUpdate
 from app.core.rate_limiter import limiter
 from slowapi.errors import RateLimitExceeded
-from slowapi import _rate_limit_exceeded_handler
 from app.logs.logging_config import logger
 from app.core.security import (
     CurrentUser,
+    invalidate_all_permissions,
     require_permission,
 )
 
 router = APIRouter()
-app = FastAPI()
-
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 @router.post("/create-actor", response_model=ActorResponse)
 @limiter.limit("3/minute")
@@ -124,6 +119,7 @@ async def update_actor(
             actor.description = data.description
 
         await actor.save()
+        await invalidate_all_permissions()
         background_tasks.add_task(
             logger.info,
             f"Actor updated with ID: {actor.id}"
@@ -198,6 +194,7 @@ async def delete_actor(
 
         actor.is_active = False
         await actor.save()
+        await invalidate_all_permissions()
         background_tasks.add_task(
             logger.info,
             f"Actor deleted with ID: {actor_id}"
@@ -1,9 +1,7 @@
-from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Request, BackgroundTasks
 from fastapi.responses import JSONResponse
 from slowapi import Limiter
 from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
 import logging
 
 from app.repositories.company_repository import CompanyRepository
@@ -48,7 +46,7 @@ async def create_company(
     try:
         company = await CompanyRepository.create_company(
             company_data=company_data,
-            owner_id=str(current_user.id)
+            owner_id=current_user.user_id
         )
         
         background_tasks.add_task(
@@ -174,10 +172,10 @@ async def get_company(
                 detail="Company not found"
             )
         
-        user_companies = await CompanyRepository.get_user_companies(str(current_user.id))
+        user_companies = await CompanyRepository.get_user_companies(current_user.user_id)
         has_access = any(str(c.id) == company_id for c in user_companies)
         
-        if not has_access and not (current_user.is_superuser or "admin" in current_user.permissions):
+        if not has_access and not (current_user.is_superuser or current_user.is_admin):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied"
@@ -240,7 +238,7 @@ async def update_company(
     
     try:
         user_role = await CompanyRepository.get_user_company_role(
-            user_id=str(current_user.id),
+            user_id=current_user.user_id,
             company_id=company_id
         )
         
@@ -307,7 +305,7 @@ async def delete_company(
     try:
         success = await CompanyRepository.delete_company(
             company_id=company_id,
-            user_id=str(current_user.id)
+            user_id=current_user.user_id
         )
         
         if not success:
@@ -1,13 +1,7 @@
-from itertools import count
-from fastapi import Request, BackgroundTasks, APIRouter, HTTPException, status, FastAPI, Depends
+from fastapi import Request, BackgroundTasks, APIRouter, HTTPException, status, Depends
 from app.schemas.company_branch import CompanyBranchCreate, CompanyBranchResponse
 from app.core.rate_limiter import limiter
-from slowapi.errors import RateLimitExceeded
-from slowapi import _rate_limit_exceeded_handler
 from app.logs.logging_config import logger
-from app.core.security import (
-    get_current_user,
-)
 from app.models.user import User
 from app.core.monitoring import monitor_endpoint, record_response_time
 from app.middleware.audit_log import audit_log_action
@@ -16,10 +10,6 @@ from typing import List
 from app.core.security import get_current_user, require_permission, CurrentUser
 
 router = APIRouter()
-app = FastAPI()
-
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 
 @router.post(
@@ -48,7 +38,7 @@ async def create_company_branch(
         branch = await CompanyBranchRepository.create_company_branch(
             company_id=company_id,
             branch_data=branch_data,
-            created_by_id=str(current_user.user_id)
+            created_by_id=current_user.user_id
         )
         
         background_tasks.add_task(
@@ -105,10 +95,10 @@ async def list_company_branches(
     start_time = time.time()
     
     try:
-        user_companies = await CompanyBranchRepository.get_user_company_branches(str(current_user.id))
+        user_companies = await CompanyBranchRepository.get_user_company_branches(current_user.user_id)
         has_access = any(str(c.id) == company_id for c in user_companies)
         
-        if not has_access and not (current_user.is_superuser or "admin" in current_user.permissions):
+        if not has_access and not (current_user.is_superuser or current_user.is_admin):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied"
@@ -13,7 +13,6 @@ from app.schemas.job_requirement import (
     JobRequirementListResponse
 )
 from app.core.security import get_current_user, CurrentUser, require_permission
-from app.models.user import User
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -36,9 +35,9 @@ async def create_job_requirement(
     ),
 ):
     try:
-        job_data.user_id = str(current_user.user_id)
+        job_data.user_id = current_user.user_id
         job = await JobRequirementService.create_job_requirement(
-            user_id=str(current_user.user_id),
+            user_id=current_user.user_id,
             job_data=job_data
         )
         return job
@@ -71,7 +70,7 @@ async def search_job_requirements(
     current_user: CurrentUser = Depends(get_current_user),
 ):
     try:
-        user_id = str(current_user.user_id) if current_user else None
+        user_id = current_user.user_id if current_user else None
         logger.info(
         "[API] search_job_requirements called | "
         f"q={q}, programming_languages={programming_languages}, "
@@ -113,7 +112,7 @@ async def get_job_requirement(
     current_user: CurrentUser = Depends(get_current_user),
 ):
     try:
-        user_id = str(current_user.user_id) if current_user else None
+        user_id = current_user.user_id if current_user else None
         job = await JobRequirementService.get_job_requirement(
             job_id=job_id,
             user_id=user_id
@@ -148,7 +147,7 @@ async def update_job_requirement(
     try:
         job = await JobRequirementService.update_job_requirement(
             job_id=job_id,
-            user_id=str(current_user.user_id),
+            user_id=current_user.user_id,
             update_data=update_data
         )
         return job
@@ -180,7 +179,7 @@ async def delete_job_requirement(
     try:
         await JobRequirementService.delete_job_requirement(
             job_id=job_id,
-            user_id=str(current_user.user_id),
+            user_id=current_user.user_id,
             hard_delete=hard_delete
         )
         
@@ -214,7 +213,7 @@ async def list_job_requirements(
     current_user: CurrentUser = Depends(get_current_user),
 ):
     try:
-        user_id = str(current_user.user_id) if current_user else None
+        user_id = current_user.user_id if current_user else None
         jobs, total = await JobRequirementService.list_job_requirements(
             user_id=user_id,
             company_branch_id=company_branch_id,
@@ -252,7 +251,7 @@ async def export_job_requirements(
     current_user: CurrentUser = Depends(get_current_user),
 ):
     try:
-        user_id = str(current_user.user_id)
+        user_id = current_user.user_id
         export_result = await JobRequirementService.export_job_requirements(
             user_id=user_id,
             company_branch_id=company_branch_id,
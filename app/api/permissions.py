@@ -1,23 +1,18 @@
 from bson import ObjectId
-from fastapi import Request, BackgroundTasks, APIRouter, HTTPException, status, FastAPI, Depends, Query
+from fastapi import Request, BackgroundTasks, APIRouter, HTTPException, status, Depends, Query
 from app.utils.time import now_utc
-from datetime import datetime, timedelta, timezone
 from app.models.permission import Permission
 from app.schemas.permission import PermissionCreate, PermissionResponse, PermissionUpdate, PermissionListResponse
 from app.core.rate_limiter import limiter
 from slowapi.errors import RateLimitExceeded
-from slowapi import _rate_limit_exceeded_handler
 from app.logs.logging_config import logger
 from app.core.security import (
     CurrentUser,
+    invalidate_all_permissions,
     require_permission,
 )
 
 router = APIRouter()
-app = FastAPI()
-
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 @router.post("/create-permission", response_model=PermissionResponse)
 @limiter.limit("5/minute")
@@ -127,6 +122,7 @@ async def update_permission(
 
         permission.updated_at = now_utc()
         await permission.save()
+        await invalidate_all_permissions()
         background_tasks.add_task(
             logger.info,
             f"Permission updated with ID: {permission.id}"
@@ -197,6 +193,7 @@ async def delete_permission(
         permission.is_active = False
         permission.updated_at = now_utc()
         await permission.save()
+        await invalidate_all_permissions()
         background_tasks.add_task(
             logger.info,
             f"Permission deleted with ID: {permission.id}"
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, FastAPI, BackgroundTasks, Request
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request
 from app.schemas.user import (
     AccessToken,
     LoginRequest,
@@ -10,13 +10,10 @@ from app.schemas.user import (
 from app.models.user import User
 from app.core.security import (
     blacklist_token,
+    blacklist_token_local,
     create_access_token,
-    get_password_hash,
     get_current_user,
-    verify_password,
     CurrentUser,
-    require_permission,
-    decode_jwt_token,
     password_strength_check,
     create_token_pair
 )
@@ -28,24 +25,30 @@ from app.core.email_otp import send_otp_email
 from app.models.email_otp import EmailOTP
 from app.utils.otp import generate_otp
 from app.core.rate_limiter import limiter
-from slowapi.errors import RateLimitExceeded
-from slowapi import _rate_limit_exceeded_handler
 from app.utils.time import now_utc, ensure_utc
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta
 from app.models.actor import Actor
 from app.models.user_actor import UserActor
 from app.core.config import settings
 from bson import ObjectId
 from app.repositories.user_repository import UserRepository
-from app.middleware.audit_log import log_security_event, log_audit_action
 from app.models.audit_log import AuditEventType
 
 router = APIRouter()
 
-app = FastAPI()
+_OTP_TTL = timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
+_OTP_RESEND_COOLDOWN = timedelta(seconds=30)
 
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+def _build_otp_document(email: str, otp_code: str, otp_type: str, expires_at, now) -> dict:
+    # Defaults (attempts, max_attempts, is_used) come from the EmailOTP model
+    return EmailOTP(
+        email=email,
+        otp_code=otp_code,
+        otp_type=otp_type,
+        expires_at=expires_at,
+        created_at=now,
+        updated_at=now,
+    ).model_dump(exclude={"id", "revision_id"})
 
 @router.post("/register", status_code=status.HTTP_201_CREATED, response_model=UserResponse)
 @limiter.limit("3/minute")
@@ -119,7 +122,8 @@ async def register(
                     f"Failed to assign default role to user {data.email}: {e}"
                 )
         otp_code = generate_otp()
-        expires_at = now_utc() + timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
+        now = now_utc()
+        expires_at = now + _OTP_TTL
         
         existing_otp = await EmailOTP.find_one({
             "email": data.email,
@@ -132,18 +136,12 @@ async def register(
             existing_otp.expires_at = expires_at
             existing_otp.attempts = 0
             existing_otp.is_used = False
-            existing_otp.updated_at = now_utc()
+            existing_otp.updated_at = now
             await existing_otp.save()
         else:
-            email_otp = EmailOTP(
-                email=data.email,
-                otp_code=otp_code,
-                otp_type="registration",
-                expires_at=expires_at,
-                created_at=now_utc(),
-                updated_at=now_utc()
+            await EmailOTP.get_motor_collection().insert_one(
+                _build_otp_document(data.email, otp_code, "registration", expires_at, now)
             )
-            await email_otp.insert()
         
         background_tasks.add_task(
             send_otp_email,
@@ -348,7 +346,8 @@ async def resend_otp(
         
         otp_code = generate_otp()
         print(otp_code)
-        expires_at = now_utc() + timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
+        now = now_utc()
+        expires_at = now + _OTP_TTL
         
         existing_otp = await EmailOTP.find_one({
             "email": data.email,
@@ -357,8 +356,8 @@ async def resend_otp(
         })
         
         if existing_otp:
-            time_since_creation = now_utc() - ensure_utc(existing_otp.created_at)
-            if time_since_creation < timedelta(seconds=30):  # 30 seconds cooldown
+            time_since_creation = now - ensure_utc(existing_otp.created_at)
+            if time_since_creation < _OTP_RESEND_COOLDOWN:
                 raise HTTPException(
                     status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                     detail="Please wait before requesting another OTP"
@@ -368,18 +367,12 @@ async def resend_otp(
             existing_otp.expires_at = expires_at
             existing_otp.attempts = 0
             existing_otp.is_used = False
-            existing_otp.updated_at = now_utc()
+            existing_otp.updated_at = now
             await existing_otp.save()
         else:
-            email_otp = EmailOTP(
-                email=data.email,
-                otp_code=otp_code,
-                otp_type="registration",
-                expires_at=expires_at,
-                created_at=now_utc(),
-                updated_at=now_utc()
+            await EmailOTP.get_motor_collection().insert_one(
+                _build_otp_document(data.email, otp_code, "registration", expires_at, now)
             )
-            await email_otp.insert()
         
         # background_tasks.add_task(
         #     send_otp_email,
@@ -541,27 +534,30 @@ async def login(
 @router.post("/logout", status_code=status.HTTP_200_OK)
 async def logout(
     request: Request,
-    current_user: CurrentUser = Depends(get_current_user),
-    background_tasks: BackgroundTasks = None
+    background_tasks: BackgroundTasks,
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     try:
         token = await get_token_from_request(request)
         if token:
-            await blacklist_token(token)
+            blacklist_token_local(token)
+            background_tasks.add_task(blacklist_token, token)
             
-            if background_tasks:
-                background_tasks.add_task(
-                    log_security_event,
-                    event_type=AuditEventType.USER_LOGOUT,
-                    user_id=str(current_user.user.id),
-                    event_name = "logout",
-                    email=current_user.user.email,
-                    ip_address=request.client.host if request.client else None,
-                    user_agent=request.headers.get("user-agent"),
-                    success=True
-                )
+            background_tasks.add_task(
+                log_security_event,
+                event_type=AuditEventType.USER_LOGOUT,
+                user_id=str(current_user.user.id),
+                event_name = "logout",
+                email=current_user.user.email,
+                ip_address=request.client.host if request.client else None,
+                user_agent=request.headers.get("user-agent"),
+                success=True
+            )
             
-            logger.info(f"User logged out: {current_user.user.email}")
+            background_tasks.add_task(
+                logger.info,
+                f"User logged out: {current_user.user.email}"
+            )
         
         return {"message": "Logged out successfully"}
         
@@ -580,7 +576,6 @@ async def refresh_token(
             decode_jwt_token,
             is_token_blacklisted,
             blacklist_token,
-            create_access_token,
             create_token_pair
         )
         
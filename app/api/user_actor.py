@@ -1,25 +1,19 @@
 from bson import ObjectId
-from fastapi import Request, BackgroundTasks, APIRouter, HTTPException, status, FastAPI, Depends
-from app.utils.time import now_utc
+from fastapi import Request, BackgroundTasks, APIRouter, HTTPException, status, Depends
 from app.models.user import User
 from app.models.actor import Actor
 from app.models.user_actor import UserActor
 from app.schemas.user import UserActorResponse
 from app.core.rate_limiter import limiter
 from bson.errors import InvalidId
-from slowapi.errors import RateLimitExceeded
-from slowapi import _rate_limit_exceeded_handler
 from app.logs.logging_config import logger
 from app.api.permissions import (
     CurrentUser,
     require_permission,
 )
+from app.core.security import invalidate_user_permissions
 
 router = APIRouter()
-app = FastAPI()
-
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 @router.post("/user-actors", response_model=UserActorResponse, status_code=201)
 @limiter.limit("5/minute")
@@ -74,6 +68,8 @@ async def assign_actor_to_user(
             )
         raise
 
+    await invalidate_user_permissions(user_id)
+
     return UserActorResponse(
         user_id=str(user.id),
         full_name=user.full_name,
@@ -163,6 +159,7 @@ async def delete_user_actor(
         )
 
     await user_actor.delete()
+    await invalidate_user_permissions(str(user_actor.user_id))
 
     background_tasks.add_task(
         logger.info,
@@ -1,9 +1,8 @@
-from typing import List, Optional
+from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status, Request, BackgroundTasks
 from fastapi.responses import JSONResponse
 from slowapi import Limiter
 from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
 import logging
 
 from app.repositories.user_company_repository import UserCompanyRepository
@@ -15,7 +14,7 @@ from app.schemas.user_company import (
     UserCompanyListResponse,
     UserCompanyStats
 )
-from app.core.security import get_current_user, require_permission
+from app.core.security import get_current_user
 from app.models.user import User
 from app.core.monitoring import monitor_endpoint, record_response_time, record_business_metric
 from app.middleware.audit_log import audit_log_action
@@ -47,7 +46,7 @@ async def assign_user_to_company_branch(
     
     try:
         user_role = await CompanyRepository.get_user_company_role(
-            user_id=str(current_user.id),
+            user_id=current_user.user_id,
             company_id=data.company_id  # Need to get company_id from branch
         )
         
@@ -81,7 +80,7 @@ async def assign_user_to_company_branch(
                 company_id=str(branch.company_id),
                 user_id=data.user_id,
                 role="member",
-                added_by=str(current_user.id)
+                added_by=current_user.user_id
             )
             
             if not success:
@@ -93,7 +92,7 @@ async def assign_user_to_company_branch(
         assignment = await UserCompanyRepository.assign_user_to_branch(
             user_id=data.user_id,
             company_branch_id=data.company_branch_id,
-            assigned_by=str(current_user.id),
+            assigned_by=current_user.user_id,
             role=data.role,
             permissions=data.permissions
         )
@@ -108,7 +107,7 @@ async def assign_user_to_company_branch(
             "user_assigned_to_branch",
             tags={
                 "company_branch_id": data.company_branch_id,
-                "assigned_by": str(current_user.id),
+                "assigned_by": current_user.user_id,
                 "role": data.role or "member"
             }
         )
@@ -167,7 +166,7 @@ async def unassign_user_from_company_branch(
     
     try:
         user_role = await CompanyRepository.get_user_company_role(
-            user_id=str(current_user.id),
+            user_id=current_user.user_id,
             company_id=data.company_id
         )
         
@@ -180,7 +179,7 @@ async def unassign_user_from_company_branch(
         success = await UserCompanyRepository.unassign_user_from_branch(
             user_id=data.user_id,
             company_branch_id=data.company_branch_id,
-            unassigned_by=str(current_user.id)
+            unassigned_by=current_user.user_id
         )
         
         if not success:
@@ -193,7 +192,7 @@ async def unassign_user_from_company_branch(
             "user_unassigned_from_branch",
             tags={
                 "company_branch_id": data.company_branch_id,
-                "unassigned_by": str(current_user.id)
+                "unassigned_by": current_user.user_id
             }
         )
         
@@ -247,11 +246,11 @@ async def delete_user_company_assignment(
     start_time = time.time()
     
     try:
-        if not (current_user.is_superuser or "admin" in current_user.permissions):
+        if not (current_user.is_superuser or current_user.is_admin):
             assignment = await UserCompanyRepository.get_assignment(assignment_id)
             if assignment:
                 user_role = await CompanyRepository.get_user_company_role(
-                    user_id=str(current_user.id),
+                    user_id=current_user.user_id,
                     company_id=assignment.company_id  # Need company_id in assignment
                 )
                 
@@ -263,7 +262,7 @@ async def delete_user_company_assignment(
         
         success = await UserCompanyRepository.delete_assignment(
             assignment_id=assignment_id,
-            deleted_by=str(current_user.id)
+            deleted_by=current_user.user_id
         )
         
         if not success:
@@ -274,7 +273,7 @@ async def delete_user_company_assignment(
         
         record_business_metric(
             "user_company_assignment_deleted",
-            tags={"deleted_by": str(current_user.id)}
+            tags={"deleted_by": current_user.user_id}
         )
         
         logger.warning(
@@ -328,11 +327,11 @@ async def get_user_company_assignment(
             )
         
         has_access = await CompanyRepository.validate_user_access(
-            user_id=str(current_user.id),
+            user_id=current_user.user_id,
             company_branch_id=assignment.company_branch_id
         )
         
-        if not has_access and not (current_user.is_superuser or "admin" in current_user.permissions):
+        if not has_access and not (current_user.is_superuser or current_user.is_admin):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied"
@@ -399,11 +398,11 @@ async def list_branch_users(
     
     try:
         has_access = await CompanyRepository.validate_user_access(
-            user_id=str(current_user.id),
+            user_id=current_user.user_id,
             company_branch_id=company_branch_id
         )
         
-        if not has_access and not (current_user.is_superuser or "admin" in current_user.permissions):
+        if not has_access and not (current_user.is_superuser or current_user.is_admin):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied"
@@ -493,13 +492,13 @@ async def list_user_branches(
     start_time = time.time()
     
     try:
-        if user_id != str(current_user.id) and not (current_user.is_superuser or "admin" in current_user.permissions):
+        if user_id != current_user.user_id and not (current_user.is_superuser or current_user.is_admin):
             user_assignments = await UserCompanyRepository.list_user_assignments(user_id, active_only)
             can_view = False
             
             for assignment in user_assignments:
                 user_role = await CompanyRepository.get_user_company_role(
-                    user_id=str(current_user.id),
+                    user_id=current_user.user_id,
                     company_branch_id=assignment.company_branch_id
                 )
                 if user_role in ["owner", "admin", "manager"]:
@@ -580,11 +579,11 @@ async def get_branch_assignment_stats(
     
     try:
         has_access = await CompanyRepository.validate_user_access(
-            user_id=str(current_user.id),
+            user_id=current_user.user_id,
             company_branch_id=company_branch_id
         )
         
-        if not has_access and not (current_user.is_superuser or "admin" in current_user.permissions):
+        if not has_access and not (current_user.is_superuser or current_user.is_admin):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied"
@@ -636,7 +635,7 @@ async def update_assignment_role(
             )
         
         user_role = await CompanyRepository.get_user_company_role(
-            user_id=str(current_user.id),
+            user_id=current_user.user_id,
             company_branch_id=assignment.company_branch_id
         )
         
@@ -649,7 +648,7 @@ async def update_assignment_role(
         updated_assignment = await UserCompanyRepository.update_assignment_role(
             assignment_id=assignment_id,
             role=role,
-            updated_by=str(current_user.id)
+            updated_by=current_user.user_id
         )
         
         if not updated_assignment:
@@ -673,7 +672,7 @@ async def update_assignment_role(
                 "assignment_id": assignment_id,
                 "old_role": assignment.role,
                 "new_role": role,
-                "updated_by": str(current_user.id)
+                "updated_by": current_user.user_id
             }
         )
         
@@ -1,11 +1,90 @@
-from typing import List, Optional, Union, Dict, Any
+from typing import Annotated, Mapping, Optional, Union, Dict, Any, FrozenSet, Tuple
+from functools import cached_property, lru_cache
+from enum import Enum
 from pathlib import Path
+from types import MappingProxyType
 from pydantic import Field, field_validator, ConfigDict, SecretStr, computed_field
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, NoDecode
 import os
 import json
 import secrets
 
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+
+class AIProvider(str, Enum):
+    OPENAI = "openai"
+    AZURE = "azure"
+    GEMINI = "gemini"
+    HUGGINGFACE = "huggingface"
+    NONE = "none"
+
+
+_CSV_FIELDS = (
+    "CORS_ORIGINS",
+    "CORS_ALLOW_METHODS",
+    "CORS_ALLOW_HEADERS",
+    "CORS_EXPOSE_HEADERS",
+    "ALLOWED_RESUME_EXTENSIONS",
+    "ALLOWED_IMAGE_EXTENSIONS",
+    "ALLOWED_DOCUMENT_EXTENSIONS",
+)
+
+_RESUME_MIME_TYPES = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "doc": "application/msword",
+}
+
+_IMAGE_MIME_TYPES = {
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+}
+
+
+def _split_csv(items) -> Tuple[str, ...]:
+    return tuple(item for item in (str(raw).strip() for raw in items) if item)
+
+
+def _normalize_extensions(extensions: Tuple[str, ...]) -> FrozenSet[str]:
+    """Lowercase and drop leading dots so `.PDF` and `pdf` compare equal"""
+    return frozenset(ext.lower().lstrip(".") for ext in extensions)
+
+
+def _parse_csv_or_json(v: Any) -> Tuple[str, ...]:
+    """Normalise a comma-separated or JSON-list setting into a tuple of stripped items"""
+    if v is None:
+        return ()
+    
+    if isinstance(v, (list, tuple)):
+        return _split_csv(v)
+    
+    if isinstance(v, str):
+        # Items are stripped by _split_csv, so only the first non-blank char matters here
+        if v.lstrip()[:1] != '[':
+            return _split_csv(v.split(","))
+        v = v.strip()
+        if v.endswith(']'):
+            try:
+                parsed = _json_loads(v)
+                if isinstance(parsed, list):
+                    return _split_csv(parsed)
+            # orjson.JSONDecodeError subclasses json.JSONDecodeError
+            except json.JSONDecodeError:
+                pass
+        return _split_csv(v.split(","))
+    
+    return _split_csv(str(v).split(","))
+
+
+# NoDecode hands the raw env string to the validator instead of JSON-decoding it first
+CsvTuple = Annotated[Tuple[str, ...], NoDecode]
+
 
 class Settings(BaseSettings):
     APP_NAME: str = "Resume Screening System"
@@ -35,25 +114,23 @@ class Settings(BaseSettings):
     MONGODB_MAX_POOL_SIZE: int = Field(default=10, description="MongoDB maximum connection pool size")
     MONGODB_MIN_POOL_SIZE: int = Field(default=1, description="MongoDB minimum connection pool size")
     
-    @computed_field
-    @property
+    @cached_property
     def MONGODB_URL(self) -> str:
         uri = self.MONGODB_URI
         db_name = self.MONGODB_DB_NAME
-        if uri.endswith(f"/{db_name}") or f"/{db_name}?" in uri:
-            return uri
         
-        from urllib.parse import urlparse
-        parsed = urlparse(uri)
+        hosts_start = uri.find("://")
+        hosts_start = hosts_start + 3 if hosts_start != -1 else 0
+        query_start = uri.find("?", hosts_start)
+        if query_start == -1:
+            query_start = len(uri)
         
-        if parsed.path and parsed.path != '/':
+        path_start = uri.find("/", hosts_start, query_start)
+        if path_start != -1 and path_start + 1 < query_start:
             return uri
-        else:
-            if '?' in uri:
-                base, query = uri.split('?', 1)
-                return f"{base}/{db_name}?{query}"
-            else:
-                return f"{uri}/{db_name}"
+        
+        base = uri[:path_start] if path_start != -1 else uri[:query_start]
+        return f"{base}/{db_name}{uri[query_start:]}"
 
     PASSWORD_MIN_LENGTH: int = Field(default=6, description="pw minimum size")
     PASSWORD_MAX_LENGTH: int = Field(default=40, description="pw maximum size")
@@ -86,9 +163,9 @@ class Settings(BaseSettings):
     MAX_RESUME_SIZE: int = Field(default=5 * 1024 * 1024, description="Maximum resume size in bytes (5MB)")
     MAX_IMAGE_SIZE: int = Field(default=2 * 1024 * 1024, description="Maximum image size in bytes (2MB)")
     
-    ALLOWED_RESUME_EXTENSIONS: str = Field(default="pdf,docx,doc", description="Allowed resume extensions")
-    ALLOWED_IMAGE_EXTENSIONS: str = Field(default="jpg,jpeg,png,gif", description="Allowed image extensions")
-    ALLOWED_DOCUMENT_EXTENSIONS: str = Field(default="pdf,docx,doc,txt,rtf", description="Allowed document extensions")
+    ALLOWED_RESUME_EXTENSIONS: CsvTuple = Field(default=("pdf", "docx", "doc"), description="Allowed resume extensions")
+    ALLOWED_IMAGE_EXTENSIONS: CsvTuple = Field(default=("jpg", "jpeg", "png", "gif"), description="Allowed image extensions")
+    ALLOWED_DOCUMENT_EXTENSIONS: CsvTuple = Field(default=("pdf", "docx", "doc", "txt", "rtf"), description="Allowed document extensions")
     
     UPLOAD_CHUNK_SIZE: int = Field(default=1024 * 1024, description="Upload chunk size in bytes (1MB)")
     MAX_FILES_PER_UPLOAD: int = Field(default=10, description="Maximum files per upload")
@@ -121,12 +198,14 @@ class Settings(BaseSettings):
     RATE_LIMIT_UPLOAD: str = Field(default="10/hour", description="Upload rate limit")
     RATE_LIMIT_AUTH: str = Field(default="5/minute", description="Authentication rate limit")
     RATE_LIMIT_SCREENING: str = Field(default="20/hour", description="Resume screening rate limit")
+    RATE_LIMIT_STORAGE_URL: Optional[str] = Field(default=None, description="Rate limit storage URI (defaults to REDIS_URL)")
+    RATE_LIMIT_STRATEGY: str = Field(default="sliding-window-counter", description="Rate limit strategy: fixed-window, moving-window or sliding-window-counter")
     
-    CORS_ORIGINS: str = Field(default="http://localhost:3000,http://localhost:8080", description="CORS allowed origins")
+    CORS_ORIGINS: CsvTuple = Field(default=("http://localhost:3000", "http://localhost:8080"), description="CORS allowed origins")
     CORS_ALLOW_CREDENTIALS: bool = Field(default=True, description="Allow CORS credentials")
-    CORS_ALLOW_METHODS: str = Field(default="GET,POST,PUT,DELETE,OPTIONS,PATCH", description="Allowed HTTP methods")
-    CORS_ALLOW_HEADERS: str = Field(default="*", description="Allowed HTTP headers")
-    CORS_EXPOSE_HEADERS: str = Field(default="", description="Exposed HTTP headers")
+    CORS_ALLOW_METHODS: CsvTuple = Field(default=("GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"), description="Allowed HTTP methods")
+    CORS_ALLOW_HEADERS: CsvTuple = Field(default=("*",), description="Allowed HTTP headers")
+    CORS_EXPOSE_HEADERS: CsvTuple = Field(default=(), description="Exposed HTTP headers")
     CORS_MAX_AGE: int = Field(default=600, description="CORS max age in seconds")
     
     LOG_LEVEL: str = Field(default="INFO", description="Logging level")
@@ -142,60 +221,10 @@ class Settings(BaseSettings):
     FIRST_SUPERUSER_PASSWORD: str = Field(default="changethis", description="First superuser password")
     FIRST_SUPERUSER_FULL_NAME: str = Field(default="Admin User", description="First superuser full name")
     CREATE_FIRST_SUPERUSER: bool = Field(default=True, description="Create first superuser on startup")
-    @field_validator("CORS_ORIGINS", "CORS_ALLOW_METHODS", "CORS_ALLOW_HEADERS", "CORS_EXPOSE_HEADERS", mode="before")
-    @classmethod
-    def parse_comma_separated(cls, v: Any) -> str:
-        if v is None:
-            return ""
-        
-        if isinstance(v, list):
-            return ",".join([str(item) for item in v])
-        
-        if isinstance(v, str):
-            v = v.strip()
-            if v.startswith('[') and v.endswith(']'):
-                try:
-                    parsed = json.loads(v)
-                    if isinstance(parsed, list):
-                        return ",".join([str(item) for item in parsed])
-                except json.JSONDecodeError:
-                    pass
-            return v
-        
-        return str(v)
-    
-    @field_validator(
-        "ALLOWED_RESUME_EXTENSIONS",
-        "ALLOWED_IMAGE_EXTENSIONS", 
-        "ALLOWED_DOCUMENT_EXTENSIONS",
-        mode="before"
-    )
-    @classmethod
-    def parse_extensions(cls, v: Any) -> str:
-        if v is None:
-            return ""
-        
-        if isinstance(v, list):
-            return ",".join([str(item) for item in v])
-        
-        if isinstance(v, str):
-            v = v.strip()
-            if v.startswith('[') and v.endswith(']'):
-                try:
-                    parsed = json.loads(v)
-                    if isinstance(parsed, list):
-                        return ",".join([str(item) for item in parsed])
-                except json.JSONDecodeError:
-                    pass
-            return v
-        
-        return str(v)
-    
-    @field_validator("UPLOAD_BASE_DIR", "LOG_FILE", mode="after")
+    @field_validator(*_CSV_FIELDS, mode="before")
     @classmethod
-    def create_directories(cls, v: Path) -> Path:
-        v.mkdir(parents=True, exist_ok=True)
-        return v
+    def parse_comma_separated(cls, v: Any) -> Tuple[str, ...]:
+        return _parse_csv_or_json(v)
     
     @field_validator("ENVIRONMENT")
     @classmethod
@@ -206,42 +235,83 @@ class Settings(BaseSettings):
         return v.lower()
     
     @property
-    def cors_origins_list(self) -> List[str]:
-        return [origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip()]
+    def cors_origins_list(self) -> Tuple[str, ...]:
+        return self.CORS_ORIGINS
+    
+    @property
+    def cors_allow_methods_list(self) -> Tuple[str, ...]:
+        return self.CORS_ALLOW_METHODS
     
     @property
-    def allowed_resume_extensions_list(self) -> List[str]:
-        return [ext.strip() for ext in self.ALLOWED_RESUME_EXTENSIONS.split(",") if ext.strip()]
+    def cors_allow_headers_list(self) -> Tuple[str, ...]:
+        return self.CORS_ALLOW_HEADERS
     
     @property
-    def allowed_image_extensions_list(self) -> List[str]:
-        return [ext.strip() for ext in self.ALLOWED_IMAGE_EXTENSIONS.split(",") if ext.strip()]
+    def cors_expose_headers_list(self) -> Tuple[str, ...]:
+        return self.CORS_EXPOSE_HEADERS
     
     @property
-    def allowed_document_extensions_list(self) -> List[str]:
-        return [ext.strip() for ext in self.ALLOWED_DOCUMENT_EXTENSIONS.split(",") if ext.strip()]
+    def allowed_resume_extensions_list(self) -> Tuple[str, ...]:
+        return self.ALLOWED_RESUME_EXTENSIONS
+    
+    @property
+    def allowed_image_extensions_list(self) -> Tuple[str, ...]:
+        return self.ALLOWED_IMAGE_EXTENSIONS
+    
+    @property
+    def allowed_document_extensions_list(self) -> Tuple[str, ...]:
+        return self.ALLOWED_DOCUMENT_EXTENSIONS
+    
+    @cached_property
+    def allowed_resume_extensions_set(self) -> FrozenSet[str]:
+        return _normalize_extensions(self.ALLOWED_RESUME_EXTENSIONS)
+    
+    @cached_property
+    def allowed_image_extensions_set(self) -> FrozenSet[str]:
+        return _normalize_extensions(self.ALLOWED_IMAGE_EXTENSIONS)
+    
+    @cached_property
+    def allowed_document_extensions_set(self) -> FrozenSet[str]:
+        return _normalize_extensions(self.ALLOWED_DOCUMENT_EXTENSIONS)
     
     @property
     def upload_path(self) -> Path:
         return self.UPLOAD_BASE_DIR
     
-    @property
+    @cached_property
     def resume_upload_path(self) -> Path:
         return self.UPLOAD_BASE_DIR / "resumes"
     
-    @property
+    @cached_property
     def temp_upload_path(self) -> Path:
         return self.UPLOAD_BASE_DIR / "temp"
     
-    @property
+    @cached_property
+    def upload_abs_path(self) -> str:
+        return os.path.abspath(self.UPLOAD_BASE_DIR)
+    
+    @cached_property
+    def resume_upload_abs_path(self) -> str:
+        return os.path.join(self.upload_abs_path, "resumes")
+    
+    @cached_property
+    def temp_upload_abs_path(self) -> str:
+        return os.path.join(self.upload_abs_path, "temp")
+    
+    def ensure_upload_dirs(self) -> None:
+        """Create upload and log directories; called once at application startup"""
+        for path in (self.resume_upload_path, self.temp_upload_path, self.LOG_FILE.parent):
+            path.mkdir(parents=True, exist_ok=True)
+    
+    @cached_property
     def is_production(self) -> bool:
         return self.ENVIRONMENT == "production"
     
-    @property
+    @cached_property
     def is_development(self) -> bool:
         return self.ENVIRONMENT == "development"
     
-    @property
+    @cached_property
     def is_testing(self) -> bool:
         return self.ENVIRONMENT == "test"
     
@@ -265,27 +335,17 @@ class Settings(BaseSettings):
     def email_enabled(self) -> bool:
         return bool(self.BREVO_API_KEY and self.BREVO_SENDER_EMAIL)
     
-    @property
-    def allowed_resume_mime_types(self) -> List[str]:
-        mime_map = {
-            "pdf": "application/pdf",
-            "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            "doc": "application/msword",
-        }
-        return [mime_map[ext] for ext in self.allowed_resume_extensions_list if ext in mime_map]
+    @cached_property
+    def allowed_resume_mime_types(self) -> FrozenSet[str]:
+        return frozenset(_RESUME_MIME_TYPES[ext] for ext in self.allowed_resume_extensions_set if ext in _RESUME_MIME_TYPES)
     
-    @property
-    def allowed_image_mime_types(self) -> List[str]:
-        mime_map = {
-            "jpg": "image/jpeg",
-            "jpeg": "image/jpeg",
-            "png": "image/png",
-            "gif": "image/gif",
-        }
-        return [mime_map[ext] for ext in self.allowed_image_extensions_list if ext in mime_map]
+    @cached_property
+    def allowed_image_mime_types(self) -> FrozenSet[str]:
+        return frozenset(_IMAGE_MIME_TYPES[ext] for ext in self.allowed_image_extensions_set if ext in _IMAGE_MIME_TYPES)
     
     
-    def get_storage_config(self) -> Dict[str, Any]:
+    @cached_property
+    def storage_config(self) -> Mapping[str, Any]:
         if self.STORAGE_TYPE == "s3":
             config = {
                 "type": "s3",
@@ -306,62 +366,58 @@ class Settings(BaseSettings):
             config = {
                 "type": "local",
                 "provider": "local",  # Thêm provider
-                "base_path": str(self.upload_path.absolute()),
+                "base_path": self.upload_abs_path,
             }
         
         if "provider" not in config:
             config["provider"] = config.get("type", "local")
         
-        return config
+        return MappingProxyType(config)
     
-    def get_ai_provider_config(self) -> Dict[str, Any]:
-        if self.openai_available:
-            return {
-                "provider": "openai",
-                "api_key": self.OPENAI_API_KEY.get_secret_value() if self.OPENAI_API_KEY else None,
-                "model": self.OPENAI_MODEL,
-            }
-        elif self.azure_openai_available:
-            return {
-                "provider": "azure",
-                "api_key": self.AZURE_OPENAI_API_KEY.get_secret_value() if self.AZURE_OPENAI_API_KEY else None,
-                "endpoint": self.AZURE_OPENAI_ENDPOINT,
-                "deployment": self.AZURE_OPENAI_DEPLOYMENT,
-                "api_version": self.AZURE_OPENAI_API_VERSION,
-            }
-        elif self.gemini_available:
-            return {
-                "provider": "gemini",
-                "api_key": self.GEMINI_API_KEY.get_secret_value() if self.GEMINI_API_KEY else None,
-                "model": self.GEMINI_MODEL,
-            }
-        elif self.huggingface_available:
-            return {
-                "provider": "huggingface",
-                "api_key": self.HUGGINGFACE_API_KEY.get_secret_value() if self.HUGGINGFACE_API_KEY else None,
-                "model": self.HUGGINGFACE_MODEL,
-            }
-        else:
-            return {"provider": "none"}
+    def get_storage_config(self) -> Mapping[str, Any]:
+        return self.storage_config
     
-    def get_upload_config(self) -> Dict[str, Any]:
-        return {
-            "max_sizes": {
+    @cached_property
+    def ai_provider(self) -> AIProvider:
+        if self.openai_available:
+            return AIProvider.OPENAI
+        if self.azure_openai_available:
+            return AIProvider.AZURE
+        if self.gemini_available:
+            return AIProvider.GEMINI
+        if self.huggingface_available:
+            return AIProvider.HUGGINGFACE
+        return AIProvider.NONE
+    
+    @cached_property
+    def ai_provider_config(self) -> Mapping[str, Any]:
+        return MappingProxyType(_AI_PROVIDER_CONFIG_BUILDERS[self.ai_provider](self))
+    
+    def get_ai_provider_config(self) -> Mapping[str, Any]:
+        return self.ai_provider_config
+    
+    @cached_property
+    def upload_config(self) -> Mapping[str, Any]:
+        return MappingProxyType({
+            "max_sizes": MappingProxyType({
                 "resume": self.MAX_RESUME_SIZE,
                 "image": self.MAX_IMAGE_SIZE,
                 "default": self.MAX_UPLOAD_SIZE,
-            },
-            "allowed_extensions": {
-                "resume": self.allowed_resume_extensions_list,
-                "image": self.allowed_image_extensions_list,
-                "document": self.allowed_document_extensions_list,
-            },
-            "paths": {
-                "base": str(self.upload_path.absolute()),
-                "resumes": str(self.resume_upload_path.absolute()),
-                "temp": str(self.temp_upload_path.absolute()),
-            }
-        }
+            }),
+            "allowed_extensions": MappingProxyType({
+                "resume": self.ALLOWED_RESUME_EXTENSIONS,
+                "image": self.ALLOWED_IMAGE_EXTENSIONS,
+                "document": self.ALLOWED_DOCUMENT_EXTENSIONS,
+            }),
+            "paths": MappingProxyType({
+                "base": self.upload_abs_path,
+                "resumes": self.resume_upload_abs_path,
+                "temp": self.temp_upload_abs_path,
+            }),
+        })
+    
+    def get_upload_config(self) -> Mapping[str, Any]:
+        return self.upload_config
     
     def get_rate_limit_config(self) -> Dict[str, str]:
         return {
@@ -375,13 +431,41 @@ class Settings(BaseSettings):
         env_file=".env",
         env_file_encoding="utf-8",
         case_sensitive=False,
-        extra="allow",
+        extra="ignore",
+        frozen=True,
+        populate_by_name=False,
         validate_default=False, 
     )
-    # class Config:
-    #     env_file=".env",
-    #     env_file_encoding="utf-8",
-    #     case_sensitive=False,
-    #     extra="allow"
 
-settings = Settings()
\ No newline at end of file
+_AI_PROVIDER_CONFIG_BUILDERS = {
+    AIProvider.OPENAI: lambda s: {
+        "provider": AIProvider.OPENAI.value,
+        "api_key": s.OPENAI_API_KEY.get_secret_value(),
+        "model": s.OPENAI_MODEL,
+    },
+    AIProvider.AZURE: lambda s: {
+        "provider": AIProvider.AZURE.value,
+        "api_key": s.AZURE_OPENAI_API_KEY.get_secret_value(),
+        "endpoint": s.AZURE_OPENAI_ENDPOINT,
+        "deployment": s.AZURE_OPENAI_DEPLOYMENT,
+        "api_version": s.AZURE_OPENAI_API_VERSION,
+    },
+    AIProvider.GEMINI: lambda s: {
+        "provider": AIProvider.GEMINI.value,
+        "api_key": s.GEMINI_API_KEY.get_secret_value(),
+        "model": s.GEMINI_MODEL,
+    },
+    AIProvider.HUGGINGFACE: lambda s: {
+        "provider": AIProvider.HUGGINGFACE.value,
+        "api_key": s.HUGGINGFACE_API_KEY.get_secret_value(),
+        "model": s.HUGGINGFACE_MODEL,
+    },
+    AIProvider.NONE: lambda s: {"provider": AIProvider.NONE.value},
+}
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Process-wide Settings instance; call get_settings.cache_clear() to re-read .env"""
+    return Settings()
+
+settings = get_settings()
@@ -1,5 +1,5 @@
 import motor.motor_asyncio
-from beanie import init_beanie, Document
+from beanie import init_beanie, Document, PydanticObjectId
 from app.core.config import settings
 
 from app.models.job_requirement import JobRequirement
@@ -7,7 +7,7 @@ from app.models.user import User
 from app.models.company import Company
 from app.models.user_company import UserCompany
 from app.models.actor_permission import ActorPermission
-from app.models.permission import Permission
+from app.models.permission import Permission, PermissionNameView
 from app.models.actor import Actor
 from app.models.user_actor import UserActor
 from app.models.company_branch import CompanyBranch
@@ -18,15 +18,24 @@ from app.models.screening_result import ScreeningResult
 from app.models.ai_model import AIModel
 from app.models.job_application import JobApplication
 from app.models.audit_log import AuditLog
+from app.utils.time import now_utc
+from app.core.security import invalidate_all_permissions
 
-from pymongo.errors import DuplicateKeyError
-import os
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+import asyncio
 import datetime
+import os
 import logging
-from typing import Type, List
+from typing import Any, Dict, Optional, Type, List, Set
 
 logger = logging.getLogger(__name__)
-INIT_FILE_PATH = ".initdb"
+# Marker file of the old file-based seed gate; only read to carry existing deployments over
+LEGACY_INIT_FILE_PATH = ".initdb"
+
+_motor_client: Optional[motor.motor_asyncio.AsyncIOMotorClient] = None
+SEED_INSERT_BATCH_SIZE = 100
+SYSTEM_META_COLLECTION = "system_meta"
+SEED_MARKER_ID = "init_done"
 
 DOCUMENT_MODELS = [
     User,
@@ -66,271 +75,219 @@ MODEL_NAMES = {
     "AuditLog": AuditLog,
 }
 
-async def _ensure_default_permissions() -> None:
-    default_actions = ("view", "create", "edit", "delete", "list")
+def _resolve_collection_name(model_name: str, model_class: Type[Document]) -> str:
+    model_settings = getattr(model_class, "Settings", None)
+    if model_settings and hasattr(model_settings, "name"):
+        return model_settings.name
+    return model_name.lower() + "s"
 
-    existing_perms_cursor = Permission.find_all()
-    existing_perms_set = {perm.name for perm in await existing_perms_cursor.to_list()}
+COLLECTION_NAMES = tuple(
+    _resolve_collection_name(model_name, model_class)
+    for model_name, model_class in MODEL_NAMES.items()
+)
 
-    perms_to_create = []
+DEFAULT_PERMISSION_ACTIONS = ("view", "create", "edit", "delete", "list")
 
-    for model_name, model_class in MODEL_NAMES.items():
-        model_settings = getattr(model_class, "Settings", None)
-        if model_settings and hasattr(model_settings, "name"):
-            collection_name = model_settings.name
-        else:
-            collection_name = model_name.lower() + "s"
-        
-        for action in default_actions:
-            perm_name = f"{collection_name}:{action}"
-            
-            if perm_name not in existing_perms_set:
-                perms_to_create.append(
-                    Permission(
-                        name=perm_name, 
-                        description=f"Permission to {action} {collection_name}",
-                        is_active=True
-                    )
-                )
-                existing_perms_set.add(perm_name)
-    
-    special_permissions = [
-        ("resume_files:upload", "Permission to upload resume files"),
-        ("resume_files:parse", "Permission to parse resume files"),
-        ("resume_files:screen", "Permission to screen resumes"),
-        ("screening_results:evaluate", "Permission to evaluate screening results"),
-        ("ai_models:train", "Permission to train AI models"),
-        ("ai_models:deploy", "Permission to deploy AI models"),
-        ("jobs:match", "Permission to match jobs with resumes"),
-        ("jobs:bulk_screen", "Permission to bulk screen resumes"),
-    ]
-    
-    for perm_name, description in special_permissions:
-        if perm_name not in existing_perms_set:
-            perms_to_create.append(
-                Permission(
-                    name=perm_name,
-                    description=description,
-                    is_active=True
-                )
-            )
-            existing_perms_set.add(perm_name)
-    
-    if perms_to_create:
-        try:
-            await Permission.insert_many(perms_to_create)
-            logger.info(f"Created {len(perms_to_create)} default permissions.")
-        except DuplicateKeyError:
-            logger.info("Some default permissions already exist, skipping creation.")
-    else:
-        logger.info("No default permissions to create.")
+SPECIAL_PERMISSIONS = (
+    ("resume_files:upload", "Permission to upload resume files"),
+    ("resume_files:parse", "Permission to parse resume files"),
+    ("resume_files:screen", "Permission to screen resumes"),
+    ("screening_results:evaluate", "Permission to evaluate screening results"),
+    ("ai_models:train", "Permission to train AI models"),
+    ("ai_models:deploy", "Permission to deploy AI models"),
+    ("jobs:match", "Permission to match jobs with resumes"),
+    ("jobs:bulk_screen", "Permission to bulk screen resumes"),
+)
 
+# name -> description; keying by name collapses any default/special overlap
+DEFAULT_PERMISSIONS = {
+    **{
+        f"{collection_name}:{action}": f"Permission to {action} {collection_name}"
+        for collection_name in COLLECTION_NAMES
+        for action in DEFAULT_PERMISSION_ACTIONS
+    },
+    **dict(SPECIAL_PERMISSIONS),
+}
 
-async def _ensure_default_actors() -> None:
-    admin_role_name = settings.ADMIN_ROLE_NAME
-    admin_role = await Actor.find_one(Actor.name == admin_role_name)
+DEFAULT_PERMISSION_NAMES = list(DEFAULT_PERMISSIONS)
 
-    if not admin_role:
-        try:
-            logger.info(f"Creating default actor: {admin_role_name}")
-            admin_role = Actor(
-                name=admin_role_name, 
-                description="Full system administrator with all permissions",
-                is_default=True,
-                is_system=True
-            )
-            await admin_role.insert()
-        except DuplicateKeyError:
-            logger.info(f"Actor '{admin_role_name}' already exists, fetching...")
-            admin_role = await Actor.find_one(Actor.name == admin_role_name)
+# Role grants: exact permission names plus collection prefixes granting every action
+RECRUITER_PERMISSION_NAMES = frozenset({
+    "users:view",
+    "users:list",
+    "companies:view",
+    "companies:list",
+    "company_branches:view",
+    "company_branches:list",
+})
+RECRUITER_PERMISSION_PREFIXES = frozenset({
+    "job_requirements",
+    "resume_files",
+    "screening_results",
+    "candidate_evaluations",
+    "jobs",
+})
 
-    if admin_role:
-        all_permissions = await Permission.find_all().to_list()
-        target_admin_perm_ids = {perm.id for perm in all_permissions}
-            
-        current_admin_links = await ActorPermission.find(
-            ActorPermission.actor_id == admin_role.id
-        ).to_list()
-        current_admin_perm_ids = {link.permission_id for link in current_admin_links}
+CANDIDATE_PERMISSION_NAMES = frozenset({
+    "users:view",
+    "users:edit",
+    "job_requirements:view",
+    "job_requirements:list",
+    "resume_files:upload",
+    "resume_files:view",
+    "resume_files:edit",
+    "resume_files:delete",
+    "screening_results:view",
+    "candidate_evaluations:view",
+})
+CANDIDATE_PERMISSION_PREFIXES = frozenset()
 
-        missing_admin_perm_ids = target_admin_perm_ids - current_admin_perm_ids
-            
-        if missing_admin_perm_ids:
-            links_to_create = [
-                ActorPermission(actor_id=admin_role.id, permission_id=perm_id)
-                for perm_id in missing_admin_perm_ids
-            ]
-            await ActorPermission.insert_many(links_to_create)
-            logger.info(f"Assigned {len(links_to_create)} new permissions to actor '{admin_role_name}'.")
-        else:
-            logger.info(f"Actor '{admin_role_name}' already has all permissions.")
 
-    recruiter_role_name = settings.RECRUITER_ROLE_NAME
-    recruiter_role = await Actor.find_one(Actor.name == recruiter_role_name)
+def _is_granted(perm_name: str, names: frozenset, prefixes: frozenset) -> bool:
+    return perm_name in names or perm_name.partition(":")[0] in prefixes
+
 
-    if not recruiter_role:
+async def _insert_in_batches(model: Type[Document], documents: List[Dict[str, Any]]) -> int:
+    """Insert raw seed dicts unordered in bounded batches; duplicates are skipped and not counted"""
+    collection = model.get_motor_collection()
+    inserted = 0
+    for start in range(0, len(documents), SEED_INSERT_BATCH_SIZE):
+        batch = documents[start:start + SEED_INSERT_BATCH_SIZE]
         try:
-            logger.info(f"Creating default actor: '{recruiter_role_name}'")
-            recruiter_role = Actor(
-                name=recruiter_role_name,
-                description="Recruiter with permissions to manage jobs and screen resumes",
-                is_default=True
-            )
-            await recruiter_role.insert()
-        except DuplicateKeyError:
-            logger.info(f"Actor '{recruiter_role_name}' already exists, fetching...")
-            recruiter_role = await Actor.find_one(Actor.name == recruiter_role_name)
-    
-    if recruiter_role:
-        recruiter_permission_patterns = [
-            r"^users:view$",
-            r"^users:list$",
-            r"^companies:view$",
-            r"^companies:list$",
-            r"^company_branches:view$",
-            r"^company_branches:list$",
-            r"^job_requirements:.*$",  # All job permissions
-            r"^resume_files:.*$",      # All resume permissions
-            r"^screening_results:.*$", # All screening permissions
-            r"^candidate_evaluations:.*$", # All candidate evaluation permissions
-            r"^jobs:.*$",              # All job-related permissions
-        ]
-        
-        recruiter_permissions = []
-        all_permissions = await Permission.find_all().to_list()
-        
-        for perm in all_permissions:
-            for pattern in recruiter_permission_patterns:
-                import re
-                if re.match(pattern, perm.name):
-                    recruiter_permissions.append(perm)
-                    break
-        
-        target_recruiter_perm_ids = {perm.id for perm in recruiter_permissions}
-        
-        current_recruiter_links = await ActorPermission.find(
-            ActorPermission.actor_id == recruiter_role.id
-        ).to_list()
-        current_recruiter_perm_ids = {link.permission_id for link in current_recruiter_links}
+            await collection.insert_many(batch, ordered=False)
+            inserted += len(batch)
+        except BulkWriteError as e:
+            inserted += e.details.get("nInserted", 0)
+    return inserted
 
-        missing_recruiter_perm_ids = target_recruiter_perm_ids - current_recruiter_perm_ids
 
-        if missing_recruiter_perm_ids:
-            links_to_create = [
-                ActorPermission(actor_id=recruiter_role.id, permission_id=perm_id)
-                for perm_id in missing_recruiter_perm_ids
-            ]
-            await ActorPermission.insert_many(links_to_create)
-            logger.info(f"Assigned {len(links_to_create)} new permissions to actor '{recruiter_role_name}'.")
-        else:
-            logger.info(f"Actor '{recruiter_role_name}' already has all recruiter permissions.")
+async def _ensure_default_permissions() -> None:
+    # Counting only the default names keeps custom permissions from masking a missing default
+    seeded_count = await Permission.get_motor_collection().count_documents(
+        {"name": {"$in": DEFAULT_PERMISSION_NAMES}}
+    )
+    if seeded_count >= len(DEFAULT_PERMISSION_NAMES):
+        logger.info("No default permissions to create.")
+        return
+
+    existing_perms_set = set(await Permission.get_motor_collection().distinct("name"))
+    missing = DEFAULT_PERMISSIONS.keys() - existing_perms_set
+
+    now = now_utc()
+    perms_to_create = [
+        {"name": perm_name, "description": DEFAULT_PERMISSIONS[perm_name], "is_active": True, "created_at": now, "updated_at": now}
+        for perm_name in missing
+    ]
+    
+    if perms_to_create:
+        inserted = await _insert_in_batches(Permission, perms_to_create)
+        logger.info("Created %d default permissions.", inserted)
+    else:
+        logger.info("No default permissions to create.")
+
 
-    candidate_role_name = settings.CANDIDATE_ROLE_NAME
-    candidate_role = await Actor.find_one(Actor.name == candidate_role_name)
+async def _seed_role(
+    role_name: str, description: str, target_perm_ids: Set[PydanticObjectId], **actor_fields
+) -> List[Dict[str, Any]]:
+    """Find or create the role and return the link documents it should have"""
+    role = await Actor.find_one(Actor.name == role_name)
 
-    if not candidate_role:
+    if not role:
         try:
-            logger.info(f"Creating default actor: '{candidate_role_name}'")
-            candidate_role = Actor(
-                name=candidate_role_name,
-                description="Candidate with permissions to view and apply for jobs",
-                is_default=True
-            )
-            await candidate_role.insert()
+            logger.info("Creating default actor: '%s'", role_name)
+            role = Actor(name=role_name, description=description, is_default=True, **actor_fields)
+            await role.insert()
         except DuplicateKeyError:
-            logger.info(f"Actor '{candidate_role_name}' already exists, fetching...")
-            candidate_role = await Actor.find_one(Actor.name == candidate_role_name)
-    
-    if candidate_role:
-        candidate_permission_patterns = [
-            r"^users:view$",
-            r"^users:edit$",
-            r"^job_requirements:view$",
-            r"^job_requirements:list$",
-            r"^resume_files:upload$",
-            r"^resume_files:view$",
-            r"^resume_files:edit$",
-            r"^resume_files:delete$",
-            r"^screening_results:view$",
-            r"^candidate_evaluations:view$",
-        ]
-        
-        candidate_permissions = []
-        all_permissions = await Permission.find_all().to_list()
-        
-        for perm in all_permissions:
-            for pattern in candidate_permission_patterns:
-                import re
-                if re.match(pattern, perm.name):
-                    candidate_permissions.append(perm)
-                    break
-        
-        target_candidate_perm_ids = {perm.id for perm in candidate_permissions}
-        
-        current_candidate_links = await ActorPermission.find(
-            ActorPermission.actor_id == candidate_role.id
-        ).to_list()
-        current_candidate_perm_ids = {link.permission_id for link in current_candidate_links}
+            logger.info("Actor '%s' already exists, fetching...", role_name)
+            role = await Actor.find_one(Actor.name == role_name)
 
-        missing_candidate_perm_ids = target_candidate_perm_ids - current_candidate_perm_ids
+    if not role:
+        return []
 
-        if missing_candidate_perm_ids:
-            links_to_create = [
-                ActorPermission(actor_id=candidate_role.id, permission_id=perm_id)
-                for perm_id in missing_candidate_perm_ids
-            ]
-            await ActorPermission.insert_many(links_to_create)
-            logger.info(f"Assigned {len(links_to_create)} new permissions to actor '{candidate_role_name}'.")
-        else:
-            logger.info(f"Actor '{candidate_role_name}' already has all candidate permissions.")
+    now = now_utc()
+    return [
+        {"actor_id": role.id, "permission_id": perm_id, "created_at": now}
+        for perm_id in target_perm_ids
+    ]
+
+
+async def _ensure_default_actors() -> None:
+    all_permissions = await Permission.find_all().project(PermissionNameView).to_list()
+    id_by_name = {perm.name: perm.id for perm in all_permissions}
+
+    # The three roles write disjoint actor documents, so they can be seeded concurrently
+    role_links = await asyncio.gather(
+        _seed_role(
+            settings.ADMIN_ROLE_NAME,
+            "Full system administrator with all permissions",
+            set(id_by_name.values()),
+            is_system=True,
+        ),
+        _seed_role(
+            settings.RECRUITER_ROLE_NAME,
+            "Recruiter with permissions to manage jobs and screen resumes",
+            {perm_id for name, perm_id in id_by_name.items() if _is_granted(name, RECRUITER_PERMISSION_NAMES, RECRUITER_PERMISSION_PREFIXES)},
+        ),
+        _seed_role(
+            settings.CANDIDATE_ROLE_NAME,
+            "Candidate with permissions to view and apply for jobs",
+            {perm_id for name, perm_id in id_by_name.items() if _is_granted(name, CANDIDATE_PERMISSION_NAMES, CANDIDATE_PERMISSION_PREFIXES)},
+        ),
+    )
+
+    # One unordered write for every role; the unique (actor_id, permission_id) index rejects existing links
+    links_to_create = [link for links in role_links for link in links]
+    if links_to_create:
+        inserted = await _insert_in_batches(ActorPermission, links_to_create)
+        logger.info("Assigned %d new permissions to the default actors.", inserted)
 
 async def _ensure_default_ai_models() -> None:
     try:
-        existing_models = await AIModel.find_all().to_list()
+        has_models = await AIModel.get_motor_collection().estimated_document_count()
         
-        if not existing_models:
+        if not has_models:
             logger.info("Creating default AI models...")
             
             default_models = [
-                AIModel(
-                    name="resume-parser-default",
-                    model_type="resume_parser",
-                    provider="custom",
-                    model_id="resume-parser-v1",
-                    version="1.0.0",
-                    description="Default resume parser using rule-based extraction",
-                    is_active=True,
-                    config={
+                {
+                    "name": "resume-parser-default",
+                    "model_type": "resume_parser",
+                    "provider": "custom",
+                    "model_id": "resume-parser-v1",
+                    "version": "1.0.0",
+                    "description": "Default resume parser using rule-based extraction",
+                    "is_active": True,
+                    "config": {
                         "parser_type": "rule_based",
                         "supported_formats": ["pdf", "docx", "doc"],
                         "extraction_fields": ["personal_info", "skills", "experience", "education"]
                     },
-                    created_by=None,
-                ),
-                AIModel(
-                    name="skill-matcher-default",
-                    model_type="skill_matcher",
-                    provider="custom",
-                    model_id="skill-matcher-v1",
-                    version="1.0.0",
-                    description="Default skill matching algorithm using keyword matching",
-                    is_active=True,
-                    config={
+                    "created_by": None,
+                },
+                {
+                    "name": "skill-matcher-default",
+                    "model_type": "skill_matcher",
+                    "provider": "custom",
+                    "model_id": "skill-matcher-v1",
+                    "version": "1.0.0",
+                    "description": "Default skill matching algorithm using keyword matching",
+                    "is_active": True,
+                    "config": {
                         "matching_algorithm": "keyword_similarity",
                         "similarity_threshold": 0.7,
                         "use_synonyms": True
                     },
-                    created_by=None,
-                ),
-                AIModel(
-                    name="scoring-model-default",
-                    model_type="scoring",
-                    provider="custom",
-                    model_id="scoring-model-v1",
-                    version="1.0.0",
-                    description="Default scoring model with weighted criteria",
-                    is_active=True,
-                    config={
+                    "created_by": None,
+                },
+                {
+                    "name": "scoring-model-default",
+                    "model_type": "scoring",
+                    "provider": "custom",
+                    "model_id": "scoring-model-v1",
+                    "version": "1.0.0",
+                    "description": "Default scoring model with weighted criteria",
+                    "is_active": True,
+                    "config": {
                         "weights": {
                             "skills": 0.4,
                             "experience": 0.3,
@@ -339,21 +296,30 @@ async def _ensure_default_ai_models() -> None:
                         },
                         "normalization": "min_max"
                     },
-                    created_by=None,
-                )
+                    "created_by": None,
+                }
             ]
             
-            await AIModel.insert_many(default_models)
-            logger.info(f"Created {len(default_models)} default AI models.")
+            now = now_utc()
+            usage_defaults = {
+                "total_predictions": 0,
+                "avg_processing_time": 0.0,
+                "last_used": None,
+                "created_at": now,
+                "updated_at": now,
+            }
+            inserted = await _insert_in_batches(
+                AIModel, [{**model, **usage_defaults} for model in default_models]
+            )
+            logger.info("Created %d default AI models.", inserted)
     except Exception as e:
-        logger.error(f"Error creating default AI models: {e}")
+        logger.error("Error creating default AI models: %s", e)
 
 async def _create_first_superuser() -> None:
     if not settings.CREATE_FIRST_SUPERUSER:
         return
     
-    existing_users = await User.find_all().limit(1).to_list()
-    if existing_users:
+    if await User.get_motor_collection().count_documents({}, limit=1):
         logger.info("Users already exist, skipping first superuser creation.")
         return
     
@@ -367,7 +333,7 @@ async def _create_first_superuser() -> None:
             is_active=True,
         )
         await superuser.insert()
-        logger.info(f"Created first superuser: {settings.FIRST_SUPERUSER_EMAIL}")
+        logger.info("Created first superuser: %s", settings.FIRST_SUPERUSER_EMAIL)
         
         admin_actor = await Actor.find_one(Actor.name == settings.ADMIN_ROLE_NAME)
         if admin_actor:
@@ -377,16 +343,87 @@ async def _create_first_superuser() -> None:
                 created_by=superuser.id,
             )
             await user_actor.insert()
-            logger.info(f"Assigned admin role to {settings.FIRST_SUPERUSER_EMAIL}")
+            logger.info("Assigned admin role to %s", settings.FIRST_SUPERUSER_EMAIL)
             
     except DuplicateKeyError:
-        logger.info(f"Superuser {settings.FIRST_SUPERUSER_EMAIL} already exists.")
+        logger.info("Superuser %s already exists.", settings.FIRST_SUPERUSER_EMAIL)
     except Exception as e:
-        logger.error(f"Error creating first superuser: {e}")
+        logger.error("Error creating first superuser: %s", e)
+
+async def _ensure_default_access_control() -> None:
+    # Actors need the permissions, and the first superuser needs the admin actor
+    await _ensure_default_permissions()
+    await _ensure_default_actors()
+    await _create_first_superuser()
+
+async def _is_seeded(database) -> bool:
+    if await database[SYSTEM_META_COLLECTION].find_one({"_id": SEED_MARKER_ID}, {"_id": 1}) is not None:
+        return True
+    if os.path.exists(LEGACY_INIT_FILE_PATH):
+        # Seeded under the old .initdb gate; record it so the seed is not re-run
+        await _mark_seeded(database)
+        logger.info('Found %s from a previous release; recorded seed marker.', LEGACY_INIT_FILE_PATH)
+        return True
+    return False
+
+async def _mark_seeded(database) -> None:
+    await database[SYSTEM_META_COLLECTION].update_one(
+        {"_id": SEED_MARKER_ID},
+        {"$setOnInsert": {"at": datetime.datetime.now(datetime.UTC)}},
+        upsert=True,
+    )
+
+LEGACY_ACTOR_PERMISSION_INDEX = "actor_id_1_permission_id_1"
+ACTOR_PERMISSION_UNIQUE_INDEX = "idx_actor_permissions_unique"
+
+async def _migrate_actor_permission_index(database) -> None:
+    # The unique link index reuses the key pattern of the old plain index, so
+    # init_beanie cannot build it until the old one and any duplicates are gone
+    collection = database[ActorPermission.Settings.name]
+    indexes = await collection.index_information()
+    if ACTOR_PERMISSION_UNIQUE_INDEX in indexes:
+        return
+
+    duplicate_ids = []
+    async for group in collection.aggregate([
+        {"$group": {
+            "_id": {"actor_id": "$actor_id", "permission_id": "$permission_id"},
+            "ids": {"$push": "$_id"},
+            "count": {"$sum": 1},
+        }},
+        {"$match": {"count": {"$gt": 1}}},
+    ]):
+        duplicate_ids.extend(group["ids"][1:])
+
+    if duplicate_ids:
+        result = await collection.delete_many({"_id": {"$in": duplicate_ids}})
+        logger.info("Removed %d duplicate actor permission links", result.deleted_count)
+
+    if LEGACY_ACTOR_PERMISSION_INDEX in indexes:
+        await collection.drop_index(LEGACY_ACTOR_PERMISSION_INDEX)
+        logger.info("Dropped legacy index %s", LEGACY_ACTOR_PERMISSION_INDEX)
+
+LEGACY_OTP_EXPIRY_INDEX = "expires_at_1"
+
+async def _migrate_email_otp_ttl_index(database) -> None:
+    # The TTL index has the old plain expires_at key pattern under a new name;
+    # drop the old one so init_beanie can create the TTL version
+    collection = database[EmailOTP.Settings.name]
+    indexes = await collection.index_information()
+    if LEGACY_OTP_EXPIRY_INDEX in indexes:
+        await collection.drop_index(LEGACY_OTP_EXPIRY_INDEX)
+        logger.info("Dropped legacy index %s", LEGACY_OTP_EXPIRY_INDEX)
+
+async def _migrate_indexes(database) -> None:
+    await asyncio.gather(
+        _migrate_actor_permission_index(database),
+        _migrate_email_otp_ttl_index(database),
+    )
 
 async def init_db():
+    global _motor_client
     try:
-        logger.info(f"Connecting to MongoDB...")
+        logger.info("Connecting to MongoDB...")
         
         client = motor.motor_asyncio.AsyncIOMotorClient(
             settings.MONGODB_URL,
@@ -397,8 +434,10 @@ async def init_db():
         
         await client.admin.command('ping')
         logger.info("✓ MongoDB connection successful")
+        _motor_client = client
         
         database = client[settings.MONGODB_DB_NAME]
+        await _migrate_indexes(database)
 
         try:
             await init_beanie(
@@ -406,112 +445,68 @@ async def init_db():
                 document_models=DOCUMENT_MODELS,
             )
             # logger.info("AuditLog collection: %s", AuditLog.get_motor_collection())
-            logger.info(f'Beanie initialized with {len(DOCUMENT_MODELS)} models in database: {settings.MONGODB_DB_NAME}')
+            logger.info('Beanie initialized with %d models in database: %s', len(DOCUMENT_MODELS), settings.MONGODB_DB_NAME)
         except Exception as beanie_error:
-            logger.warning(f"Beanie initialization failed: {beanie_error}")
+            logger.warning("Beanie initialization failed: %s", beanie_error)
             logger.warning("Continuing without Beanie - some ODM features may not work")
             for model in DOCUMENT_MODELS:
                 try:
                     model._database = database
-                    logger.debug(f"Assigned database to {model.__name__}")
+                    logger.debug("Assigned database to %s", model.__name__)
                 except:
                     pass
         
-        if not os.path.exists(INIT_FILE_PATH):
-            logger.info(f'File {INIT_FILE_PATH} not found. Starting default data initialization.')
+        if not await _is_seeded(database):
+            logger.info('Seed marker not found. Starting default data initialization.')
             
             try:
-                await _ensure_default_permissions()
-                await _ensure_default_actors()
-                await _ensure_default_ai_models()
-                await _create_first_superuser()
+                # AI models are independent; the RBAC chain must stay ordered
+                await asyncio.gather(_ensure_default_access_control(), _ensure_default_ai_models())
                 
-                with open(INIT_FILE_PATH, 'w', encoding='utf-8') as f:
-                    f.write(f"Default data initialized on: {datetime.datetime.now(datetime.UTC)}")
-                    
-                logger.info(f'Created file {INIT_FILE_PATH}. Will not reinitialize default data on next startup.')
-                logger.info('Default data initialization completed.')
+                await _mark_seeded(database)
+                # Seeded role links bypass the API, so bump the permission cache version here
+                await invalidate_all_permissions()
+                logger.info('Default data initialization completed. Will not reinitialize default data on next startup.')
                 
-            except IOError as e:
-                logger.error(f'Cannot create {INIT_FILE_PATH}. Data may be reinitialized on next startup. Error: {e}')
             except Exception as e:
-                logger.error(f'Error during data initialization: {e}')
+                logger.error('Error during data initialization: %s', e)
                 raise
         else:
-            logger.info(f'File {INIT_FILE_PATH} found. Skipping default data initialization.')
+            logger.info('Seed marker found. Skipping default data initialization.')
         
         return True
         
     except Exception as e:
-        logger.error(f"✗ Failed to initialize database: {e}")
+        logger.error("✗ Failed to initialize database: %s", e)
         return False
 
 async def close_db():
-    logger.info("Database connections will be closed automatically.")
-
-# async def create_indexes():
-#     from motor.motor_asyncio import AsyncIOMotorClient
-#     from app.core.config import settings
-    
-#     logger.info("Creating/verifying database indexes...")
-    
-#     client = None
-#     try:
-#         client = AsyncIOMotorClient(settings.MONGODB_URI)
-#         db = client[settings.MONGODB_DB_NAME]
-        
-#         await db.users.create_index([("email", 1)], unique=True, name="idx_users_email")
-#         await db.users.create_index([("full_name", 1)], name="idx_users_full_name")
-#         await db.users.create_index([("phone_number", 1)], unique=True, sparse=True, name="idx_users_phone")
-        
-#         await db.companies.create_index([("user_id", 1)], name="idx_companies_user_id")
-#         await db.companies.create_index([("company_code", 1)], unique=True, name="idx_companies_company_code")
-#         await db.companies.create_index([("email", 1)], name="idx_companies_email")
-#         await db.companies.create_index([("is_active", 1)], name="idx_companies_active")
-#         await db.companies.create_index([("name", 1)], name="idx_companies_name")
-        
-#         await db.permissions.create_index([("name", 1)], unique=True, name="idx_permissions_name")
-#         await db.permissions.create_index([("is_active", 1)], name="idx_permissions_active")
-        
-#         await db.actors.create_index([("name", 1)], name="idx_actors_name")
-#         await db.actors.create_index([("created_at", -1)], name="idx_actors_created_at_desc")
-#         await db.actors.create_index([("is_active", 1)], name="idx_actors_active")
-        
-#         await db.email_otps.create_index([("expires_at", 1)], expireAfterSeconds=0, name="ttl_index")
-#         await db.email_otps.create_index([("email", 1), ("otp_type", 1)], name="email_otp_type_idx")
-#         await db.email_otps.create_index([("email", 1), ("otp_type", 1), ("is_used", 1), ("expires_at", 1)], 
-#                                          name="active_otp_idx")
-#         await db.email_otps.create_index([("is_used", 1)], name="idx_otp_is_used")
-        
-#         logger.info("All indexes created successfully")
-        
-#     except Exception as e:
-#         logger.error(f"Error creating indexes: {e}")
-#         raise
-#     finally:
-#         if client:
-#             client.close()
+    global _motor_client
+    if _motor_client is not None:
+        _motor_client.close()
+        _motor_client = None
 
 async def check_connection() -> bool:
+    if _motor_client is None:
+        return False
     try:
-        client = motor.motor_asyncio.AsyncIOMotorClient(
-            settings.MONGODB_URL,
-            serverSelectionTimeoutMS=5000
-        )
-        await client.admin.command('ping')
-        logger.info("MongoDB connection successful")
+        await _motor_client.admin.command('ping')
         return True
     except Exception as e:
-        logger.error(f"MongoDB connection check failed: {e}")
+        logger.error("MongoDB connection check failed: %s", e)
         return False
-    finally:
-        if 'client' in locals():
-            client.close()
 
-async def get_database_info() -> dict:
+def get_database() -> Optional[motor.motor_asyncio.AsyncIOMotorDatabase]:
+    """Application database on the shared client, or None before init_db has connected"""
+    if _motor_client is None:
+        return None
+    return _motor_client[settings.MONGODB_DB_NAME]
+
+async def get_database_info(db: Optional[motor.motor_asyncio.AsyncIOMotorDatabase] = None) -> dict:
     try:
-        client = motor.motor_asyncio.AsyncIOMotorClient(settings.MONGODB_URL)
-        db = client[settings.MONGODB_DB_NAME]
+        db = db if db is not None else get_database()
+        if db is None:
+            raise RuntimeError("Database is not initialized")
         
         db_stats = await db.command("dbstats")
         
@@ -526,9 +521,7 @@ async def get_database_info() -> dict:
                     "indexes": list(indexes.keys())
                 }
             except Exception as e:
-                logger.warning(f"Cannot get indexes for {collection_name}: {e}")
-        
-        client.close()
+                logger.warning("Cannot get indexes for %s: %s", collection_name, e)
         
         return {
             "database_name": settings.MONGODB_DB_NAME,
@@ -541,7 +534,7 @@ async def get_database_info() -> dict:
             "status": "connected"
         }
     except Exception as e:
-        logger.error(f"Error getting database info: {e}")
+        logger.error("Error getting database info: %s", e)
         return {
             "database_name": settings.MONGODB_DB_NAME,
             "status": "error",
@@ -549,17 +542,21 @@ async def get_database_info() -> dict:
         }
 
 async def cleanup_expired_data():
+    """Purge expired OTPs immediately.
+
+    Routine cleanup is handled by the TTL index on EmailOTP.expires_at, which
+    mongod sweeps about once a minute; call this only when expired codes must be
+    gone right away.
+    """
     try:
-        from datetime import datetime, timezone
-        
-        expired_otp_count = await EmailOTP.find({
-            "expires_at": {"$lt": datetime.now(timezone.utc)}
-        }).delete()
+        result = await EmailOTP.get_motor_collection().delete_many({
+            "expires_at": {"$lt": now_utc()}
+        })
         
-        if expired_otp_count > 0:
-            logger.info(f"Cleaned up {expired_otp_count} expired OTPs")
+        if result.deleted_count > 0:
+            logger.info("Cleaned up %d expired OTPs", result.deleted_count)
         
-        return expired_otp_count
+        return result.deleted_count
     except Exception as e:
-        logger.error(f"Error cleaning up expired data: {e}")
-        return 0
\ No newline at end of file
+        logger.error("Error cleaning up expired data: %s", e)
+        return 0
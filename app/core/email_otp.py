@@ -1,6 +1,10 @@
+import asyncio
 import os
 import logging
+from functools import lru_cache
+from string import Template
 from typing import Optional
+import httpx
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -23,65 +27,34 @@ BREVO_API_KEY = os.getenv("BREVO_API_KEY")
 BREVO_SENDER_EMAIL = os.getenv("BREVO_SENDER_EMAIL")
 BREVO_SENDER_NAME = os.getenv("BREVO_SENDER_NAME", "No Reply")
 
+BREVO_API_BASE_URL = "https://api.brevo.com"
 
-def initialize_brevo_client():
-    """Initialize and return Brevo API client configuration"""
-    if not BREVO_SDK_AVAILABLE:
-        raise ImportError("Brevo SDK is not installed. Please install with: pip install brevo-python")
-    
-    if not BREVO_API_KEY:
-        raise ValueError("BREVO_API_KEY is not set in environment variables")
-    
-    configuration = sib_api_v3_sdk.Configuration()
-    configuration.api_key['api-key'] = BREVO_API_KEY
-    
-    return configuration
+_CLIENT_RESET_STATUSES = frozenset({401, 403})
 
+_http_client: Optional[httpx.AsyncClient] = None
 
-async def send_otp_email(
-    email: str,
-    otp: str,
-    otp_type: str = "registration",
-    full_name: Optional[str] = None,
-    template_id: Optional[int] = None,
-) -> bool:
-    if not BREVO_SDK_AVAILABLE:
-        logger.error("Brevo SDK not available")
-        return False
-    
-    if not BREVO_API_KEY:
-        logger.error("BREVO_API_KEY is not configured")
-        return False
-    
-    if not BREVO_SENDER_EMAIL:
-        logger.error("BREVO_SENDER_EMAIL is not configured")
-        return False
-    
-    try:
-        configuration = initialize_brevo_client()
-        api_instance = sib_api_v3_sdk.TransactionalEmailsApi(
-            sib_api_v3_sdk.ApiClient(configuration)
-        )
-        
-        subject_map = {
-            "registration": "Verify Your Email Address",
-            "password_reset": "Reset Your Password",
-            "login": "Your Login Code",
-            "verification": "Verification Code",
-            "email_change": "Confirm Your New Email",
-            "transaction": "Transaction Verification",
-        }
-        
-        greeting = f"Hello {full_name}," if full_name else "Hello,"
-        
-        html_content = f"""
+_APP_NAME = os.getenv("APP_NAME", "Your Application")
+_CURRENT_YEAR = os.getenv("CURRENT_YEAR", "2024")
+_SUPPORT_EMAIL = os.getenv("SUPPORT_EMAIL", "support@example.com")
+
+_OTP_SUBJECTS = {
+    "registration": "Verify Your Email Address",
+    "password_reset": "Reset Your Password",
+    "login": "Your Login Code",
+    "verification": "Verification Code",
+    "email_change": "Confirm Your New Email",
+    "transaction": "Transaction Verification",
+}
+
+# Bodies are built once at import; per-send values are left as $placeholders
+_OTP_HTML_TEMPLATE = Template(Template("""
         <!DOCTYPE html>
         <html>
         <head>
             <meta charset="UTF-8">
             <meta name="viewport" content="width=device-width, initial-scale=1.0">
             <style>
-                body {{ 
+                body { 
                     font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, sans-serif;
                     line-height: 1.6; 
                     color: #333; 
@@ -89,34 +62,34 @@ async def send_otp_email(
                     margin: 0 auto; 
                     padding: 20px;
                     background-color: #f9f9f9;
-                }}
-                .container {{
+                }
+                .container {
                     background: white;
                     border-radius: 12px;
                     padding: 30px;
                     box-shadow: 0 4px 6px rgba(0, 0, 0, 0.05);
-                }}
-                .header {{
+                }
+                .header {
                     text-align: center; 
                     padding: 20px 0;
                     border-bottom: 1px solid #eee;
                     margin-bottom: 25px;
-                }}
-                .logo {{
+                }
+                .logo {
                     font-size: 24px;
                     font-weight: bold;
                     color: #4f46e5;
                     margin-bottom: 10px;
-                }}
-                .otp-container {{
+                }
+                .otp-container {
                     background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
                     padding: 25px;
                     text-align: center;
                     margin: 25px 0;
                     border-radius: 12px;
                     color: white;
-                }}
-                .otp-code {{
+                }
+                .otp-code {
                     font-size: 36px;
                     font-weight: bold;
                     letter-spacing: 8px;
@@ -126,35 +99,35 @@ async def send_otp_email(
                     padding: 15px;
                     border-radius: 8px;
                     display: inline-block;
-                }}
-                .instructions {{
+                }
+                .instructions {
                     background: #f8fafc;
                     padding: 15px;
                     border-radius: 8px;
                     margin: 20px 0;
                     border-left: 4px solid #4f46e5;
-                }}
-                .warning {{
+                }
+                .warning {
                     color: #dc2626;
                     background: #fef2f2;
                     padding: 15px;
                     border-radius: 8px;
                     margin: 20px 0;
                     border: 1px solid #fecaca;
-                }}
-                .footer {{
+                }
+                .footer {
                     margin-top: 30px; 
                     padding-top: 20px; 
                     border-top: 1px solid #eee; 
                     text-align: center; 
                     color: #666; 
                     font-size: 13px;
-                }}
-                .expiry {{
+                }
+                .expiry {
                     color: #f59e0b;
                     font-weight: 500;
                     margin-top: 10px;
-                }}
+                }
             </style>
         </head>
         <body>
@@ -164,16 +137,16 @@ async def send_otp_email(
                     <h2 style="margin: 10px 0; color: #374151;">Your Security Code</h2>
                 </div>
                 
-                <p style="font-size: 16px;">{greeting}</p>
+                <p style="font-size: 16px;">$greeting</p>
                 
                 <p style="font-size: 15px; color: #4b5563;">
                     Use the following One-Time Password (OTP) to complete your 
-                    <strong>{otp_type.replace('_', ' ').title()}</strong>:
+                    <strong>$otp_type_title</strong>:
                 </p>
                 
                 <div class="otp-container">
                     <div style="font-size: 14px; opacity: 0.9;">YOUR VERIFICATION CODE</div>
-                    <div class="otp-code">{otp}</div>
+                    <div class="otp-code">$otp</div>
                     <div class="expiry">⏰ Valid for 10 minutes</div>
                 </div>
                 
@@ -199,24 +172,28 @@ async def send_otp_email(
                 </p>
                 
                 <div class="footer">
-                    <p style="margin: 5px 0;">© {os.getenv("APP_NAME", "Your Application")} {os.getenv("CURRENT_YEAR", "2024")}</p>
+                    <p style="margin: 5px 0;">© $app_name $current_year</p>
                     <p style="margin: 5px 0; font-size: 12px; color: #9ca3af;">
                         This is an automated message. Please do not reply to this email.
                     </p>
                     <p style="margin: 5px 0; font-size: 12px; color: #9ca3af;">
-                        Need help? Contact: {os.getenv("SUPPORT_EMAIL", "support@example.com")}
+                        Need help? Contact: $support_email
                     </p>
                 </div>
             </div>
         </body>
         </html>
-        """
-        
-        text_content = f"""{greeting}
+        """).safe_substitute(
+    app_name=_APP_NAME,
+    current_year=_CURRENT_YEAR,
+    support_email=_SUPPORT_EMAIL,
+))
 
-Your One-Time Password (OTP) for {otp_type.replace('_', ' ')}:
+_OTP_TEXT_TEMPLATE = Template(Template("""$greeting
 
-{otp}
+Your One-Time Password (OTP) for $otp_type_label:
+
+$otp
 
 This code is valid for 10 minutes.
 
@@ -232,61 +209,252 @@ We will never ask for your OTP via phone, email, or chat.
 If you didn't request this code, please ignore this email.
 
 Best regards,
-{os.getenv("APP_NAME", "Your Application")} Team
-"""
+$app_name Team
+""").safe_substitute(app_name=_APP_NAME))
+
+_RESET_HTML_TEMPLATE = Template(Template("""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        </head>
+        <body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; padding: 20px;">
+            <h2 style="color: #374151;">Reset Your Password</h2>
+            <p style="font-size: 16px;">$greeting</p>
+            <p style="font-size: 15px; color: #4b5563;">
+                Use the following reset token to choose a new password:
+            </p>
+            <div style="font-family: monospace; font-size: 16px; background: #f8fafc; border: 1px solid #e5e7eb; border-radius: 8px; padding: 15px; word-break: break-all; user-select: all;">$token</div>
+            <p style="color: #f59e0b; font-weight: 500;">⏰ Valid for $expiry_minutes minutes</p>
+            <p style="font-size: 14px; color: #6b7280;">
+                If you didn't request a password reset, please ignore this email. Your password will not change.
+            </p>
+            <p style="margin-top: 30px; text-align: center; color: #9ca3af; font-size: 12px;">
+                © $app_name $current_year · Need help? Contact: $support_email
+            </p>
+        </body>
+        </html>
+        """).safe_substitute(
+    app_name=_APP_NAME,
+    current_year=_CURRENT_YEAR,
+    support_email=_SUPPORT_EMAIL,
+))
+
+_RESET_TEXT_TEMPLATE = Template(Template("""$greeting
+
+Use the following token to reset your password:
+
+$token
+
+This token is valid for $expiry_minutes minutes.
+
+If you didn't request a password reset, please ignore this email.
+
+Best regards,
+$app_name Team
+""").safe_substitute(app_name=_APP_NAME))
+
+_WELCOME_HTML_TEMPLATE = Template("""
+        <!DOCTYPE html>
+        <html>
+        <body>
+            <h2>Welcome to Our Platform, $full_name!</h2>
+            <p>Your account has been successfully created.</p>
+            $login_link
+        </body>
+        </html>
+        """)
+
+
+def initialize_brevo_client():
+    """Initialize and return Brevo API client configuration"""
+    if not BREVO_SDK_AVAILABLE:
+        raise ImportError("Brevo SDK is not installed. Please install with: pip install brevo-python")
+    
+    if not BREVO_API_KEY:
+        raise ValueError("BREVO_API_KEY is not set in environment variables")
+    
+    configuration = sib_api_v3_sdk.Configuration()
+    configuration.api_key['api-key'] = BREVO_API_KEY
+    
+    return configuration
+
+
+def get_brevo_http_client() -> httpx.AsyncClient:
+    """Shared async client so OTP sends reuse pooled keep-alive connections"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            base_url=BREVO_API_BASE_URL,
+            headers={
+                "api-key": BREVO_API_KEY or "",
+                "accept": "application/json",
+                "content-type": "application/json",
+            },
+            limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+            timeout=10.0,
+        )
+    return _http_client
+
+
+async def close_email_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+@lru_cache(maxsize=1)
+def get_transactional_email_api():
+    """Shared Brevo API instance so sends reuse one HTTP connection pool"""
+    return sib_api_v3_sdk.TransactionalEmailsApi(
+        sib_api_v3_sdk.ApiClient(initialize_brevo_client())
+    )
+
+
+async def _post_brevo_email(payload: dict, email: str, kind: str) -> Optional[str]:
+    """POST a transactional email; returns the Brevo message id, or None on failure"""
+    try:
+        response = await get_brevo_http_client().post("/v3/smtp/email", json=payload)
+        response.raise_for_status()
+        return response.json().get("messageId") or ""
         
-        send_smtp_email = sib_api_v3_sdk.SendSmtpEmail(
-            sender=sib_api_v3_sdk.SendSmtpEmailSender(
-                name=BREVO_SENDER_NAME,
-                email=BREVO_SENDER_EMAIL
-            ),
-            to=[sib_api_v3_sdk.SendSmtpEmailTo(
-                email=email,
-                name=full_name or ""
-            )],
-            subject=subject_map.get(otp_type, "Your Security Code"),
-            html_content=html_content,
-            text_content=text_content,
-            tags=["OTP", otp_type.upper(), "AUTOMATED"],
-            params={
+    except httpx.HTTPStatusError as e:
+        logger.error(f" Brevo API error {e.response.status_code} when sending {kind} to {email}")
+        
+        if e.response.text:
+            logger.error(f"   API Response: {e.response.text}")
+        
+        return None
+        
+    except httpx.HTTPError as e:
+        logger.error(f" Brevo request failed when sending {kind} to {email}: {e}")
+        return None
+
+
+async def send_otp_email(
+    email: str,
+    otp: str,
+    otp_type: str = "registration",
+    full_name: Optional[str] = None,
+    template_id: Optional[int] = None,
+) -> bool:
+    if not BREVO_API_KEY:
+        logger.error("BREVO_API_KEY is not configured")
+        return False
+    
+    if not BREVO_SENDER_EMAIL:
+        logger.error("BREVO_SENDER_EMAIL is not configured")
+        return False
+    
+    try:
+        greeting = f"Hello {full_name}," if full_name else "Hello,"
+        otp_type_label = otp_type.replace('_', ' ')
+        otp_type_title = otp_type_label.title()
+        
+        html_content = _OTP_HTML_TEMPLATE.substitute(
+            greeting=greeting,
+            otp=otp,
+            otp_type_title=otp_type_title,
+        )
+        text_content = _OTP_TEXT_TEMPLATE.substitute(
+            greeting=greeting,
+            otp=otp,
+            otp_type_label=otp_type_label,
+        )
+        
+        payload = {
+            "sender": {"name": BREVO_SENDER_NAME, "email": BREVO_SENDER_EMAIL},
+            "to": [{"email": email, "name": full_name or ""}],
+            "subject": _OTP_SUBJECTS.get(otp_type, "Your Security Code"),
+            "htmlContent": html_content,
+            "textContent": text_content,
+            "tags": ["OTP", otp_type.upper(), "AUTOMATED"],
+            "params": {
                 "otp": otp,
                 "otp_type": otp_type,
                 "full_name": full_name or "",
                 "company_name": BREVO_SENDER_NAME,
                 "expiry_minutes": 30
             }
-        )
+        }
         
         if template_id:
-            send_smtp_email.template_id = template_id
-            send_smtp_email.params = {
+            payload["templateId"] = template_id
+            payload["params"] = {
                 "OTP": otp,
                 "NAME": full_name or "",
-                "TYPE": otp_type.replace('_', ' ').title()
+                "TYPE": otp_type_title
             }
         
-        api_response = api_instance.send_transac_email(send_smtp_email)
+        message_id = await _post_brevo_email(payload, email, "OTP")
+        if message_id is None:
+            return False
         
-        logger.info(f"✅ OTP email sent successfully to {email}. Message ID: {api_response.message_id}")
+        logger.info(f"✅ OTP email sent successfully to {email}. Message ID: {message_id}")
         logger.info(f"   OTP: {otp}, Type: {otp_type}, Recipient: {full_name or 'N/A'}")
         
         return True
         
-    except ApiException as e:
-        error_msg = str(e)
-        logger.error(f" Brevo API Exception when sending OTP to {email}: {error_msg}")
+    except Exception as e:
+        logger.error(f"❌ Unexpected error sending OTP to {email}: {str(e)}", exc_info=True)
+        return False
+
+
+async def send_password_reset_email(
+    email: str,
+    token: str,
+    expires_in: int,
+    full_name: Optional[str] = None,
+) -> bool:
+    if not BREVO_API_KEY:
+        logger.error("BREVO_API_KEY is not configured")
+        return False
+    
+    if not BREVO_SENDER_EMAIL:
+        logger.error("BREVO_SENDER_EMAIL is not configured")
+        return False
+    
+    try:
+        greeting = f"Hello {full_name}," if full_name else "Hello,"
+        expiry_minutes = max(1, expires_in // 60)
+        
+        payload = {
+            "sender": {"name": BREVO_SENDER_NAME, "email": BREVO_SENDER_EMAIL},
+            "to": [{"email": email, "name": full_name or ""}],
+            "subject": _OTP_SUBJECTS["password_reset"],
+            "htmlContent": _RESET_HTML_TEMPLATE.substitute(
+                greeting=greeting,
+                token=token,
+                expiry_minutes=expiry_minutes,
+            ),
+            "textContent": _RESET_TEXT_TEMPLATE.substitute(
+                greeting=greeting,
+                token=token,
+                expiry_minutes=expiry_minutes,
+            ),
+            "tags": ["PASSWORD_RESET", "AUTOMATED"],
+        }
         
-        if hasattr(e, 'body') and e.body:
-            logger.error(f"   API Response: {e.body}")
+        message_id = await _post_brevo_email(payload, email, "password reset")
+        if message_id is None:
+            return False
         
-        return False
+        logger.info(f"✅ Password reset email sent to {email}. Message ID: {message_id}")
+        return True
         
     except Exception as e:
-        logger.error(f"❌ Unexpected error sending OTP to {email}: {str(e)}", exc_info=True)
+        logger.error(f"❌ Unexpected error sending password reset to {email}: {str(e)}", exc_info=True)
         return False
 
 
-def send_welcome_email(
+def _send_brevo_sync(send_smtp_email):
+    """Blocking SDK send; run it off the event loop"""
+    return get_transactional_email_api().send_transac_email(send_smtp_email)
+
+
+async def send_welcome_email(
     email: str,
     full_name: str,
     login_url: Optional[str] = None,
@@ -295,22 +463,11 @@ def send_welcome_email(
         return False
     
     try:
-        configuration = initialize_brevo_client()
-        api_instance = sib_api_v3_sdk.TransactionalEmailsApi(
-            sib_api_v3_sdk.ApiClient(configuration)
+        html_content = _WELCOME_HTML_TEMPLATE.substitute(
+            full_name=full_name,
+            login_link=f'<p><a href="{login_url}">Click here to log in</a></p>' if login_url else '',
         )
         
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <body>
-            <h2>Welcome to Our Platform, {full_name}!</h2>
-            <p>Your account has been successfully created.</p>
-            {f'<p><a href="{login_url}">Click here to log in</a></p>' if login_url else ''}
-        </body>
-        </html>
-        """
-        
         send_smtp_email = sib_api_v3_sdk.SendSmtpEmail(
             sender=sib_api_v3_sdk.SendSmtpEmailSender(
                 name=BREVO_SENDER_NAME,
@@ -325,12 +482,14 @@ def send_welcome_email(
             tags=["WELCOME", "ONBOARDING"]
         )
         
-        api_response = api_instance.send_transac_email(send_smtp_email)
+        await asyncio.to_thread(_send_brevo_sync, send_smtp_email)
         logger.info(f"✅ Welcome email sent to {email}")
         return True
         
     except Exception as e:
         logger.error(f"❌ Error sending welcome email: {e}")
+        if isinstance(e, ApiException) and e.status in _CLIENT_RESET_STATUSES:
+            get_transactional_email_api.cache_clear()
         return False
 
 
@@ -1,4 +1,12 @@
 from slowapi import Limiter
 from slowapi.util import get_remote_address
+from app.core.config import settings
 
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(
+    key_func=get_remote_address,
+    default_limits=[settings.RATE_LIMIT_DEFAULT] if settings.RATE_LIMIT_ENABLED else [],
+    storage_uri=settings.RATE_LIMIT_STORAGE_URL or settings.REDIS_URL,
+    strategy=settings.RATE_LIMIT_STRATEGY,
+    key_prefix="ratelimit",
+    in_memory_fallback_enabled=True,
+)
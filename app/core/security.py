@@ -1,8 +1,11 @@
 import os
 from datetime import datetime, timedelta, timezone
-from typing import Callable, List, Optional, Set, Dict, Any, Union
+from typing import Callable, FrozenSet, List, Optional, Set, Dict, Any, Tuple, Union
 from functools import lru_cache
+import asyncio
+import json
 import logging
+import secrets
 
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer, OAuth2PasswordBearer
@@ -39,6 +42,14 @@ def get_jwt_settings() -> Dict[str, Any]:
         "refresh_token_expire_days": settings.REFRESH_TOKEN_EXPIRE_DAYS,
     }
 
+_ACCESS_TTL = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+_REFRESH_TTL = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
+PERMISSION_CACHE_TTL = 600
+PERMISSION_CACHE_PREFIX = "perms:"
+PERMISSION_VERSION_PREFIX = "perms_version:"
+PERMISSION_GLOBAL_VERSION_KEY = f"{PERMISSION_VERSION_PREFIX}global"
+
 security_bearer = HTTPBearer(
     scheme_name="JWT",
     description="Enter JWT token as: Bearer <token>",
@@ -75,17 +86,18 @@ def create_access_token(
 ) -> str:
     jwt_settings = get_jwt_settings()
     to_encode = data.copy()
+    now = datetime.now(timezone.utc)
     
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = now + expires_delta
     elif token_type == "refresh":
-        expire = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        expire = now + _REFRESH_TTL
     else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = now + _ACCESS_TTL
     
     to_encode.update({
         "exp": expire,
-        "iat": datetime.now(timezone.utc),
+        "iat": now,
         "type": token_type,
     })
     
@@ -138,6 +150,18 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         logger.error(f"Password verification error: {e}")
         return False
 
+@lru_cache()
+def get_dummy_password_hash() -> str:
+    return get_password_context().hash(secrets.token_urlsafe(16))
+
+async def verify_dummy_password() -> None:
+    """Spend one real hash verification so reset requests take the same time whether or not the account exists."""
+    await asyncio.to_thread(_verify_dummy_password_sync)
+
+def _verify_dummy_password_sync() -> bool:
+    # Hashing the dummy on first use must also stay off the event loop
+    return verify_password("dummy-password", get_dummy_password_hash())
+
 def password_strength_check(password: str) -> Dict[str, Any]:
     issues = []
     
@@ -163,14 +187,19 @@ def password_strength_check(password: str) -> Dict[str, Any]:
         "score": max(0, 100 - len(issues) * 20)  # Simple score calculation
     }
 
+def blacklist_token_local(token: str) -> None:
+    _in_memory_blacklist.add(token)
+
 async def is_token_blacklisted(token: str, redis: Optional[Redis] = None) -> bool:
     try:
+        if token in _in_memory_blacklist:
+            return True
+        
         if not redis:
             redis = get_redis()
         
         if not redis:
-            from app.core.security import _in_memory_blacklist
-            return token in _in_memory_blacklist
+            return False
         
         token_key = f"blacklist:token:{token}"
         return await redis.exists(token_key) > 0
@@ -188,7 +217,6 @@ async def blacklist_token(
             redis = get_redis()
         
         if not redis:
-            from app.core.security import _in_memory_blacklist
             _in_memory_blacklist.add(token)
             return
         
@@ -196,6 +224,7 @@ async def blacklist_token(
         expire_seconds = expires_in or settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
         
         await redis.setex(token_key, expire_seconds, "1")
+        _in_memory_blacklist.discard(token)
         logger.debug(f"Token blacklisted: {token_key}")
     except Exception as e:
         logger.error(f"Error blacklisting token: {e}")
@@ -217,16 +246,15 @@ class CurrentUser:
     def __init__(
         self, 
         user: User, 
-        actors: List[Actor], 
-        permissions: List[Permission],
-        token_payload: Optional[TokenPayload] = None
+        actor_names: Set[str],
+        permission_names: Set[str],
+        token_payload: Optional[TokenPayload] = None,
     ):
         self.user = user
-        self.actors = actors
-        self.permissions = permissions
+        self._user_id = str(user.id) if user.id else None
         self.token_payload = token_payload
-        self._permission_names = {perm.name for perm in permissions}
-        self._actor_names = {actor.name for actor in actors}
+        self._permission_names = frozenset(permission_names)
+        self._actor_names = frozenset(actor_names)
         self._scopes = set(token_payload.scopes if token_payload else [])
     
     def __getattr__(self, item):
@@ -238,7 +266,15 @@ class CurrentUser:
 
     @property
     def user_id(self) -> Optional[str]:
-        return str(self.user.id) if self.user.id else None
+        return self._user_id
+    
+    @property
+    def actor_names(self) -> FrozenSet[str]:
+        return self._actor_names
+    
+    @property
+    def permission_names(self) -> FrozenSet[str]:
+        return self._permission_names
     
     @property
     def is_admin(self) -> bool:
@@ -301,6 +337,92 @@ async def get_token_from_request(
     
     return None
 
+async def _load_user_access(user_id) -> Tuple[List[Actor], List[Permission]]:
+    actor_links = await UserActor.find(
+        UserActor.user_id == user_id
+    ).to_list()
+    
+    actor_ids = list({link.actor_id for link in actor_links})
+    actors = []
+    if actor_ids:
+        actors = await Actor.find(
+            {"_id": {"$in": actor_ids}, "is_active": True}
+        ).to_list()
+    
+    active_actor_ids = [actor.id for actor in actors]
+    permissions = []
+    if active_actor_ids:
+        perm_links = await ActorPermission.find(
+            {"actor_id": {"$in": active_actor_ids}}
+        ).to_list()
+        permission_ids = list({link.permission_id for link in perm_links})
+        if permission_ids:
+            permissions = await Permission.find(
+                {"_id": {"$in": permission_ids}, "is_active": True}
+            ).to_list()
+    
+    return actors, permissions
+
+async def get_user_access(user_id) -> Tuple[Set[str], Set[str]]:
+    """Return the (actor names, permission names) of a user, cached in Redis.
+
+    The cache key embeds the user's and the global permission version, so
+    bumping either one makes the stale entry unreachable until it expires.
+    """
+    redis = get_redis()
+    cache_key = None
+    
+    if redis:
+        try:
+            user_version, global_version = await redis.mget(
+                f"{PERMISSION_VERSION_PREFIX}{user_id}",
+                PERMISSION_GLOBAL_VERSION_KEY,
+            )
+            cache_key = f"{PERMISSION_CACHE_PREFIX}{user_id}:{user_version or 0}:{global_version or 0}"
+            cached = await redis.get(cache_key)
+            if cached:
+                data = json.loads(cached)
+                return set(data["actors"]), set(data["permissions"])
+        except Exception as e:
+            logger.error(f"Error reading permission cache: {e}")
+            cache_key = None
+    
+    actors, permissions = await _load_user_access(user_id)
+    actor_names = {actor.name for actor in actors}
+    permission_names = {perm.name for perm in permissions}
+    
+    if redis and cache_key:
+        try:
+            await redis.setex(
+                cache_key,
+                PERMISSION_CACHE_TTL,
+                json.dumps({"actors": sorted(actor_names), "permissions": sorted(permission_names)}),
+            )
+        except Exception as e:
+            logger.error(f"Error writing permission cache: {e}")
+    
+    return actor_names, permission_names
+
+async def invalidate_user_permissions(user_id: str) -> None:
+    """Invalidate the cached permission set of a single user (role changes)."""
+    redis = get_redis()
+    if not redis:
+        return
+    try:
+        await redis.incr(f"{PERMISSION_VERSION_PREFIX}{user_id}")
+    except Exception as e:
+        logger.error(f"Error invalidating permissions for user {user_id}: {e}")
+
+async def invalidate_all_permissions() -> None:
+    """Invalidate every cached permission set (actor/permission changes)."""
+    redis = get_redis()
+    if not redis:
+        return
+    try:
+        await redis.incr(PERMISSION_GLOBAL_VERSION_KEY)
+    except Exception as e:
+        logger.error(f"Error invalidating permission cache: {e}")
+
 async def get_current_user(
     request: Request,
     token: Optional[str] = Depends(get_token_from_request)
@@ -341,36 +463,15 @@ async def get_current_user(
             detail=ErrorCode.USER_NOT_FOUND,
         )
     
-    actor_links = await UserActor.find(
-        UserActor.user_id == user.id
-    ).to_list()
+    actor_names, permission_names = await get_user_access(user.id)
     
-    actor_ids = list({link.actor_id for link in actor_links})
-    actors = []
-    if actor_ids:
-        actors = await Actor.find(
-            {"_id": {"$in": actor_ids}, "is_active": True}
-        ).to_list()
-    
-    active_actor_ids = [actor.id for actor in actors]
-    permissions = []
-    if active_actor_ids:
-        perm_links = await ActorPermission.find(
-            {"actor_id": {"$in": active_actor_ids}}
-        ).to_list()
-        permission_ids = list({link.permission_id for link in perm_links})
-        if permission_ids:
-            permissions = await Permission.find(
-                {"_id": {"$in": permission_ids}, "is_active": True}
-            ).to_list()
-    
-    logger.info(f"User authenticated: {user.email}, roles: {[a.name for a in actors]}")
+    logger.info(f"User authenticated: {user.email}, roles: {sorted(actor_names)}")
     
     return CurrentUser(
         user=user,
-        actors=actors,
-        permissions=permissions,
-        token_payload=token_payload
+        actor_names=actor_names,
+        permission_names=permission_names,
+        token_payload=token_payload,
     )
 
 async def get_current_active_user(
@@ -384,6 +485,7 @@ async def get_current_active_user(
         )
     return current_user
 
+@lru_cache()
 def require_permission(permission: str) -> Callable:
     async def permission_dependency(
         current_user: CurrentUser = Depends(get_current_active_user)
@@ -403,6 +505,7 @@ def require_permission(permission: str) -> Callable:
     
     return permission_dependency
 
+@lru_cache()
 def require_any_permission(*permissions: str) -> Callable:
     async def any_permission_dependency(
         current_user: CurrentUser = Depends(get_current_active_user)
@@ -422,6 +525,7 @@ def require_any_permission(*permissions: str) -> Callable:
     
     return any_permission_dependency
 
+@lru_cache()
 def require_all_permissions(*permissions: str) -> Callable:
     async def all_permission_dependency(
         current_user: CurrentUser = Depends(get_current_active_user)
@@ -441,6 +545,7 @@ def require_all_permissions(*permissions: str) -> Callable:
     
     return all_permission_dependency
 
+@lru_cache()
 def require_role(role_name: str) -> Callable:
     async def role_dependency(
         current_user: CurrentUser = Depends(get_current_active_user)
@@ -549,5 +654,6 @@ async def log_security_event(
         from app.logs.logging_config import logger
         logger.error(f"Failed to log security event: {e}", exc_info=True)
 
-# In-memory fallback for blacklist (when Redis is not available)
+# In-memory blacklist: fallback when Redis is not available, and local
+# guard for tokens whose Redis write is still pending in a background task
 _in_memory_blacklist: Set[str] = set()
\ No newline at end of file
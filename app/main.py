@@ -2,10 +2,9 @@ from fastapi import FastAPI, Request, Response, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from contextlib import asynccontextmanager
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 import time
 import logging
@@ -16,6 +15,8 @@ from pathlib import Path
 from app.core.config import settings
 from app.core.database import init_db, close_db
 from app.core.redis import init_redis, close_redis
+from app.core.email_otp import close_email_client
+from app.core.rate_limiter import limiter
 from app.dependencies.versions import api_router
 from app.middleware.request_logging import RequestLoggingMiddleware
 from app.middleware.response_time import ResponseTimeMiddleware
@@ -44,11 +45,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-limiter = Limiter(
-    key_func=get_remote_address,
-    default_limits=[settings.RATE_LIMIT_DEFAULT] if settings.RATE_LIMIT_ENABLED else []
-)
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info(f" Starting {settings.APP_NAME} v{settings.APP_VERSION}")
@@ -58,13 +54,7 @@ async def lifespan(app: FastAPI):
     startup_tasks = []
     
     try:
-        startup_tasks.append("database")
-        await init_db()
-        logger.info(" MongoDB connected successfully")
-        
-        # await create_indexes()
-        # logger.info(" Database indexes created/verified")
-        
+        # Redis first so database seeding can invalidate cached permissions
         startup_tasks.append("redis")
         try:
             await init_redis()
@@ -72,7 +62,12 @@ async def lifespan(app: FastAPI):
             logger.warning(f"Redis initialization failed: {e}")
             logger.warning("Application running without Redis (rate limiting, caching disabled)")
         
+        startup_tasks.append("database")
+        await init_db()
+        logger.info(" MongoDB connected successfully")
+        
         startup_tasks.append("directories")
+        settings.ensure_upload_dirs()
         logger.info(f" Upload directories ready at {settings.upload_path}")
         
         # Print upload config
@@ -117,6 +112,13 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f" Error closing Redis: {e}")
         
+        try:
+            shutdown_tasks.append("email client")
+            await close_email_client()
+            logger.info(" Email HTTP client closed")
+        except Exception as e:
+            logger.error(f" Error closing email client: {e}")
+        
         try:
             shutdown_tasks.append("temp files")
             await cleanup_temp_files()
@@ -168,6 +170,7 @@ app = FastAPI(
     redoc_url="/redoc" if settings.DEBUG else None,
     openapi_url="/openapi.json" if settings.DEBUG else None,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     contact={
         "name": "Support Team",
         "email": "support@resume-screening.com",
@@ -214,11 +217,11 @@ app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 if settings.CORS_ORIGINS:
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=settings.CORS_ORIGINS,
+        allow_origins=settings.cors_origins_list,
         allow_credentials=settings.CORS_ALLOW_CREDENTIALS,
-        allow_methods=settings.CORS_ALLOW_METHODS,
-        allow_headers=settings.CORS_ALLOW_HEADERS,
-        expose_headers=settings.CORS_EXPOSE_HEADERS,
+        allow_methods=settings.cors_allow_methods_list,
+        allow_headers=settings.cors_allow_headers_list,
+        expose_headers=settings.cors_expose_headers_list,
         max_age=settings.CORS_MAX_AGE,
     )
 
@@ -405,9 +408,7 @@ async def get_config(request: Request):
             return "***"
         return value[:visible_chars] + "***" + value[-visible_chars:] if len(value) > visible_chars * 2 else "***"
     
-    storage_config = settings.get_storage_config()
-    if "provider" not in storage_config and "type" in storage_config:
-        storage_config["provider"] = storage_config["type"]
+    storage_config = dict(settings.get_storage_config())
     
     config_info = {
         "environment": settings.ENVIRONMENT,
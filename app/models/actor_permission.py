@@ -1,4 +1,5 @@
 from pydantic import Field
+from pymongo import IndexModel
 from beanie import Document
 from datetime import datetime
 from app.utils.time import now_utc
@@ -14,9 +15,12 @@ class ActorPermission(Document):
             [("actor_id", 1)],
             [("permission_id", 1)],
             [("created_at", -1)],
-            [("actor_id", 1), ("permission_id", 1)],
+            IndexModel(
+                [("actor_id", 1), ("permission_id", 1)],
+                name="idx_actor_permissions_unique",
+                unique=True,
+            ),
         ]
 
     class Config:
         arbitrary_types_allowed = True
-            
\ No newline at end of file
@@ -17,7 +17,7 @@ class AIModel(Document):
     avg_processing_time: float = Field(0.0)
     last_used: Optional[datetime] = Field(None)
     description: Optional[str] = Field(None)
-    created_by: ObjectId = Field(..., description="ID of the user who created the AI model")
+    created_by: Optional[ObjectId] = Field(None, description="ID of the user who created the AI model; None for seeded defaults")
     created_at: datetime = Field(default_factory=lambda: now_utc())
     updated_at: datetime = Field(default_factory=lambda: now_utc())
     
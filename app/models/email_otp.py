@@ -3,6 +3,7 @@ from pydantic import Field, EmailStr
 from datetime import datetime
 from typing import Optional
 from bson import ObjectId
+from pymongo import IndexModel
 from app.utils.time import now_utc, is_expired_check
 
 
@@ -20,7 +21,11 @@ class EmailOTP(Document):
         name = "email_otps"
         indexes = [
             [("email", 1)],
-            [("expires_at", 1)],
+            IndexModel(
+                [("expires_at", 1)],
+                name="ttl_email_otps_expires_at",
+                expireAfterSeconds=0,
+            ),
             [("otp_type", 1)],
             [("is_used", 1)],
             [("created_at", -1)],
@@ -1,5 +1,5 @@
-from pydantic import Field
-from beanie import Document
+from pydantic import BaseModel, Field
+from beanie import Document, PydanticObjectId
 from datetime import datetime
 from app.utils.time import now_utc
 from typing import Optional
@@ -20,4 +20,9 @@ class Permission(Document):
             [("created_at", -1)],
         ]
     class Config:
-        arbitrary_types_allowed = True
\ No newline at end of file
+        arbitrary_types_allowed = True
+
+
+class PermissionNameView(BaseModel):
+    id: PydanticObjectId = Field(..., alias="_id")
+    name: str
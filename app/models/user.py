@@ -1,7 +1,8 @@
 from datetime import datetime
 from typing import Optional
-from beanie import Document, Indexed
-from pydantic import EmailStr, Field, ConfigDict
+from beanie import Document, Indexed, PydanticObjectId
+from pydantic import BaseModel, EmailStr, Field, ConfigDict
+from pymongo import IndexModel
 from app.utils.time import now_utc
 
 
@@ -34,4 +35,28 @@ class User(Document):
             [("phone_number", 1)],
             [("is_active", 1)],
             [("created_at", -1)],
-        ]
\ No newline at end of file
+            IndexModel(
+                [("is_superuser", 1)],
+                name="idx_users_superuser",
+                partialFilterExpression={"is_superuser": True},
+            ),
+        ]
+
+
+class UserPublicView(BaseModel):
+    id: PydanticObjectId = Field(..., alias="_id")
+    email: str
+    full_name: Optional[str] = None
+    phone_number: Optional[str] = None
+    address: Optional[str] = None
+    created_at: Optional[datetime] = None
+    last_login: Optional[datetime] = None
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class UserAuthView(UserPublicView):
+    hashed_password: str
+    is_active: bool = True
+    is_verified: bool = False
+    is_superuser: bool = False
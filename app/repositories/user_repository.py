@@ -1,11 +1,15 @@
-from typing import List, Optional, Dict, Any, Tuple, Union
+from typing import Awaitable, Callable, List, Optional, Dict, Any, Tuple, Union
 from datetime import datetime, timedelta
+import asyncio
 from bson import ObjectId
+from pymongo import ReturnDocument
 from pymongo.errors import DuplicateKeyError
 import logging
 import bcrypt
 import secrets
-from app.models.user import User
+import base64
+import json
+from app.models.user import User, UserPublicView, UserAuthView
 from app.schemas.user import (
     UserCreate, 
     UserUpdate, 
@@ -14,28 +18,43 @@ from app.schemas.user import (
 from app.core.redis import get_redis, is_redis_available
 from app.core.monitoring import monitor_db_operation, monitor_cache_operation, monitor
 from app.utils.time import now_utc
-from app.core.config import settings
 from app.core.database import get_database_info
-from motor.motor_asyncio import AsyncIOMotorClient
 from app.core.security import get_password_hash, verify_password 
 
 logger = logging.getLogger(__name__)
 
+# Everything a cached user carries; the password hash never leaves Mongo.
+_CACHED_USER_FIELDS = frozenset(User.model_fields) - {"hashed_password"}
+_PASSWORD_EXCLUDED = {"hashed_password": 0}
+_PUBLIC_VIEW_PROJECTION = {name: 1 for name in UserPublicView.model_fields if name != "id"}
+
 
 class UserRepository:
     CACHE_PREFIX = "user:"
     USER_CACHE_TTL = 1800 
+    USER_PROFILE_CACHE_TTL = 60
     USER_LIST_CACHE_TTL = 300 
     USER_SEARCH_CACHE_TTL = 300  
     RESET_TOKEN_TTL = 3600 
     NULL_CACHE_VALUE = "__NULL__"
     NULL_CACHE_TTL = 60
+    SUPERUSER_COUNT_CACHE_TTL = 300
+    SUPERUSER_COUNT_CACHE_KEY = f"{CACHE_PREFIX}stats:superuser_count"
+    USER_STATS_CACHE_TTL = 60
+    USER_STATS_CACHE_KEY = f"{CACHE_PREFIX}stats:overall"
+    STATS_LOCK_TTL_MS = 5000
+    STATS_LOCK_POLL_INTERVAL = 0.1
+    STATS_LOCK_POLL_ATTEMPTS = 20
     
     
     @staticmethod
     def _get_user_cache_key(user_id: str) -> str:
         return f"{UserRepository.CACHE_PREFIX}user:{user_id}"
     
+    @staticmethod
+    def _get_user_profile_cache_key(user_id: str) -> str:
+        return f"{UserRepository.CACHE_PREFIX}profile:{user_id}"
+    
     @staticmethod
     def _get_user_email_cache_key(email: str) -> str:
         return f"{UserRepository.CACHE_PREFIX}user_email:{email}"
@@ -73,16 +92,101 @@ class UserRepository:
         except Exception as e:
             logger.warning(f"Error incrementing list version: {e}")
     @staticmethod
-    async def _get_user_list_cache_key(page: int, size: int, filters: dict) -> str:
+    async def _get_user_list_cache_key(
+        page: int,
+        size: int,
+        filters: dict,
+        sort_by: str,
+        sort_desc: bool,
+        cursor: Optional[str] = None,
+        include_total: bool = True
+    ) -> str:
         filter_str = str(sorted(filters.items()))
         version = await UserRepository._get_list_cache_version()
+        position = f"c{cursor}" if cursor else f"p{page}"
+        
+        return (
+            f"{UserRepository.CACHE_PREFIX}list:v{version}:{position}:{size}:"
+            f"{sort_by}:{int(sort_desc)}:t{int(include_total)}:{filter_str}"
+        )
+    
+    @staticmethod
+    def encode_list_cursor(user: UserPublicView, sort_by: str) -> str:
+        value = getattr(user, sort_by, None)
+        if isinstance(value, datetime):
+            payload = {"v": value.isoformat(), "t": "dt", "id": str(user.id)}
+        else:
+            payload = {"v": value, "t": "raw", "id": str(user.id)}
+        return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+    
+    @staticmethod
+    def _decode_list_cursor(cursor: str) -> Tuple[Any, ObjectId]:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            value = payload["v"]
+            if payload.get("t") == "dt" and value is not None:
+                value = datetime.fromisoformat(value)
+            return value, ObjectId(payload["id"])
+        except Exception:
+            raise ValueError("Invalid pagination cursor")
+    
+    @staticmethod
+    def _build_seek_filter(sort_by: str, sort_desc: bool, last_value: Any, last_id: ObjectId) -> Dict[str, Any]:
+        # Mongo orders null below every other value, so null rows come last
+        # when descending and first when ascending.
+        op = "$lt" if sort_desc else "$gt"
+        if last_value is None:
+            if sort_desc:
+                return {sort_by: None, "_id": {op: last_id}}
+            return {"$or": [
+                {sort_by: {"$ne": None}},
+                {sort_by: None, "_id": {op: last_id}},
+            ]}
+        
+        branches = [
+            {sort_by: {op: last_value}},
+            {sort_by: last_value, "_id": {op: last_id}},
+        ]
+        if sort_desc:
+            branches.append({sort_by: None})
+        return {"$or": branches}
+    
+    @staticmethod
+    async def _find_page_with_total(
+        query: Dict[str, Any],
+        sort: List[Tuple[str, int]],
+        skip: int,
+        limit: int,
+        page_filter: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[UserPublicView], int]:
+        # One $facet round trip for the page and the count of the whole match.
+        data_stages = [{"$match": page_filter}] if page_filter else []
+        data_stages.append({"$sort": dict(sort)})
+        if skip:
+            data_stages.append({"$skip": skip})
+        data_stages += [{"$limit": limit}, {"$project": _PUBLIC_VIEW_PROJECTION}]
+        
+        pipeline = [
+            {"$match": query},
+            {"$facet": {"data": data_stages, "total": [{"$count": "n"}]}},
+        ]
+        result = await User.get_motor_collection().aggregate(pipeline).to_list(length=1)
+        if not result:
+            return [], 0
         
-        return f"{UserRepository.CACHE_PREFIX}list:v{version}:{page}:{size}:{filter_str}"
+        facet = result[0]
+        users = [UserPublicView.model_validate(doc) for doc in facet["data"]]
+        total = facet["total"][0]["n"] if facet["total"] else 0
+        return users, total
     
     @staticmethod
     def _get_user_search_cache_key(search_term: str, skip: int, limit: int) -> str:
         return f"{UserRepository.CACHE_PREFIX}search:{search_term}:{skip}:{limit}"
     
+    @staticmethod
+    def _get_user_activity_stats_cache_key(user_id: str) -> str:
+        return f"{UserRepository.CACHE_PREFIX}stats:activity:{user_id}"
+    
     @staticmethod
     def _get_reset_token_cache_key(token: str) -> str:
         return f"{UserRepository.CACHE_PREFIX}reset_token:{token}"
@@ -90,12 +194,30 @@ class UserRepository:
 
     @staticmethod
     def _get_db_client():
-        return AsyncIOMotorClient(settings.MONGODB_URI)
+        return User.get_motor_collection().database.client
     
     @staticmethod
     def _get_db():
-        client = AsyncIOMotorClient(settings.MONGODB_URI)
-        return client[settings.MONGODB_DB_NAME]
+        return User.get_motor_collection().database
+
+    @staticmethod
+    def _dump_user_for_cache(user: User) -> Dict[str, Any]:
+        return user.model_dump(include=_CACHED_USER_FIELDS, mode="json")
+    
+    @staticmethod
+    def _user_without_password(data: Dict[str, Any]) -> User:
+        return User.model_validate({**data, "hashed_password": ""})
+    
+    @staticmethod
+    def _user_from_cache(data: Dict[str, Any]) -> User:
+        user = UserRepository._user_without_password(data)
+        setattr(user, '_from_cache', True)
+        return user
+    
+    @staticmethod
+    async def _find_user_without_password(query: Dict[str, Any]) -> Optional[User]:
+        raw = await User.get_motor_collection().find_one(query, _PASSWORD_EXCLUDED)
+        return UserRepository._user_without_password(raw) if raw else None
 
     @staticmethod
     def _generate_reset_token() -> str:
@@ -162,16 +284,14 @@ class UserRepository:
             if cached_data == UserRepository.NULL_CACHE_VALUE:
                 return None
             logger.debug(f"Cache hit for user: {user_id}")
-            user = User.model_validate(cached_data)
-            setattr(user, '_from_cache', True)
-            return user
+            return UserRepository._user_from_cache(cached_data)
         
         try:
-            user = await User.get(ObjectId(user_id))
+            user = await UserRepository._find_user_without_password({"_id": ObjectId(user_id)})
             if user:
                 await UserRepository._set_cache(
                     cache_key, 
-                    user.dict(exclude={"hashed_password"}),
+                    UserRepository._dump_user_for_cache(user),
                     UserRepository.USER_CACHE_TTL
                 )
             else:
@@ -185,6 +305,27 @@ class UserRepository:
             logger.error(f"Error getting user {user_id}: {e}")
             return None
     
+    @staticmethod
+    @monitor_db_operation("user_get_profile")
+    async def get_user_profile(user_id: str) -> Optional[UserPublicView]:
+        cache_key = UserRepository._get_user_profile_cache_key(user_id)
+        cached = await UserRepository._get_from_cache(cache_key)
+        if cached:
+            return UserPublicView.model_validate(cached)
+        
+        try:
+            user = await User.find_one({"_id": ObjectId(user_id)}).project(UserPublicView)
+            if user:
+                await UserRepository._set_cache(
+                    cache_key,
+                    user.model_dump_json(),
+                    UserRepository.USER_PROFILE_CACHE_TTL
+                )
+            return user
+        except Exception as e:
+            logger.error(f"Error getting user profile {user_id}: {e}")
+            return None
+    
     @staticmethod
     @monitor_db_operation("user_get_by_email")
     @monitor_cache_operation("user_get_by_email")
@@ -195,11 +336,9 @@ class UserRepository:
         if cached:
             if cached == UserRepository.NULL_CACHE_VALUE:
                 return None            
-            user = User.model_validate(cached)
-            setattr(user, "_from_cache", True)
-            return user
+            return UserRepository._user_from_cache(cached)
 
-        user = await User.find_one(User.email == email)
+        user = await UserRepository._find_user_without_password({"email": email})
         if not user:
             await UserRepository._set_cache(
                 cache_key, 
@@ -208,7 +347,7 @@ class UserRepository:
             )
             return None
 
-        data = user.model_dump(exclude={"hashed_password"})
+        data = UserRepository._dump_user_for_cache(user)
         await UserRepository._set_cache(cache_key, data, UserRepository.USER_CACHE_TTL)
 
         return user
@@ -222,23 +361,21 @@ class UserRepository:
         
         if cached_data:
             logger.debug(f"Cache hit for user username: {username}")
-            user = User.model_validate(cached_data)
-            setattr(user, '_from_cache', True)
-            return user
+            return UserRepository._user_from_cache(cached_data)
         
         try:
-            user = await User.find_one({"username": username})
+            user = await UserRepository._find_user_without_password({"username": username})
             if user:
                 id_cache_key = UserRepository._get_user_cache_key(str(user.id))
                 await UserRepository._set_cache(
                     id_cache_key,
-                    user.dict(exclude={"hashed_password"}),
+                    UserRepository._dump_user_for_cache(user),
                     UserRepository.USER_CACHE_TTL
                 )
                 
                 await UserRepository._set_cache(
                     cache_key,
-                    user.dict(exclude={"hashed_password"}),
+                    UserRepository._dump_user_for_cache(user),
                     UserRepository.USER_CACHE_TTL
                 )
                 logger.debug(f"Cache set for user username: {username}")
@@ -251,22 +388,25 @@ class UserRepository:
     @monitor_db_operation("user_update")
     async def update_user(user_id: str, update_data: UserUpdate) -> Optional[User]:
         try:
-            user = await User.get(ObjectId(user_id))
-            if not user:
-                return None
-            
             update_dict = update_data.model_dump(exclude_unset=True, exclude={"password"})
             
-            if update_data.password:
-                update_dict["hashed_password"] = UserRepository._hash_password(update_data.password)
+            password = getattr(update_data, "password", None)
+            if password:
+                update_dict["hashed_password"] = get_password_hash(password)
             
-            for field, value in update_dict.items():
-                setattr(user, field, value)
-            
-            user.updated_at = now_utc()
-            await user.save()
+            update_dict["updated_at"] = now_utc()
+            raw = await User.get_motor_collection().find_one_and_update(
+                {"_id": ObjectId(user_id)},
+                {"$set": update_dict},
+                return_document=ReturnDocument.AFTER
+            )
+            if not raw:
+                return None
             
+            user = User.model_validate(raw)
             await UserRepository._invalidate_user_caches(user)
+            if "is_superuser" in update_dict:
+                await UserRepository._delete_cache(UserRepository.SUPERUSER_COUNT_CACHE_KEY)
             
             logger.info(f"User updated: {user_id}")
             return user
@@ -279,21 +419,39 @@ class UserRepository:
     @monitor_db_operation("user_delete")
     async def delete_user(user_id: str, deleted_by: Optional[str] = None) -> bool:
         try:
-            user = await User.get(ObjectId(user_id))
-            if not user:
-                return False
-            
-            if user.is_superuser:
-                superuser_count = await User.find({"is_superuser": True}).count()
-                if superuser_count <= 1:
-                    raise ValueError("Cannot delete the last superuser")
-            
-            user.is_active = False
-            user.deleted_at = now_utc()
-            user.deleted_by = ObjectId(deleted_by) if deleted_by else None
-            await user.save()
+            user_oid = ObjectId(user_id)
+            collection = User.get_motor_collection()
+            update = {
+                "$set": {
+                    "is_active": False,
+                    "deleted_by": ObjectId(deleted_by) if deleted_by else None,
+                },
+                "$currentDate": {"deleted_at": True, "updated_at": True},
+            }
+            projection = {"email": 1}
+            
+            # Regular users are deactivated in a single round trip; the
+            # superuser guard only runs when that filter does not match.
+            raw = await collection.find_one_and_update(
+                {"_id": user_oid, "is_superuser": {"$ne": True}},
+                update,
+                projection=projection
+            )
+            if not raw:
+                if await UserRepository.get_superuser_count() <= 1:
+                    if await collection.find_one({"_id": user_oid, "is_superuser": True}, {"_id": 1}):
+                        raise ValueError("Cannot delete the last superuser")
+                    return False
+                
+                raw = await collection.find_one_and_update(
+                    {"_id": user_oid},
+                    update,
+                    projection=projection
+                )
+                if not raw:
+                    return False
             
-            await UserRepository._invalidate_user_caches(user)
+            await UserRepository._invalidate_user_cache_keys(user_id, raw["email"])
             await UserRepository._clear_user_list_caches()
             
             logger.info(f"User soft deleted: {user_id}")
@@ -320,6 +478,8 @@ class UserRepository:
             await user.delete()
             
             await UserRepository._invalidate_user_caches(user)
+            if user.is_superuser:
+                await UserRepository._delete_cache(UserRepository.SUPERUSER_COUNT_CACHE_KEY)
             
             logger.warning(f"User hard deleted: {user_id}")
             return True
@@ -332,6 +492,21 @@ class UserRepository:
             return False
     
     
+    @staticmethod
+    @monitor_db_operation("user_superuser_count")
+    async def get_superuser_count() -> int:
+        cached = await UserRepository._get_from_cache(UserRepository.SUPERUSER_COUNT_CACHE_KEY)
+        if cached is not None:
+            return int(cached)
+        
+        count = await User.find({"is_superuser": True}).count()
+        await UserRepository._set_cache(
+            UserRepository.SUPERUSER_COUNT_CACHE_KEY,
+            count,
+            UserRepository.SUPERUSER_COUNT_CACHE_TTL
+        )
+        return count
+    
     @staticmethod
     @monitor_db_operation("user_list")
     @monitor_cache_operation("user_list")
@@ -340,16 +515,21 @@ class UserRepository:
         size: int = 20,
         filters: Optional[UserFilter] = None,
         sort_by: str = "created_at",
-        sort_desc: bool = True
-    ) -> Tuple[List[User], int]:
+        sort_desc: bool = True,
+        cursor: Optional[str] = None,
+        include_total: bool = True
+    ) -> Tuple[List[UserPublicView], Optional[int]]:
+        seek = UserRepository._decode_list_cursor(cursor) if cursor else None
         filter_dict = filters.model_dump(exclude_unset=True) if filters else {}
-        cache_key = await UserRepository._get_user_list_cache_key(page, size, filter_dict)
+        cache_key = await UserRepository._get_user_list_cache_key(
+            page, size, filter_dict, sort_by, sort_desc, cursor, include_total
+        )
         cached_data = await UserRepository._get_from_cache(cache_key)
         
         if cached_data:
             logger.debug(f"Cache hit for user list: page={page}, size={size}")
-            users = [User.model_validate(item) for item in cached_data.get("users", [])]
-            total = cached_data.get("total", 0)
+            users = [UserPublicView.model_validate(item) for item in cached_data.get("users", [])]
+            total = cached_data.get("total")
             for user in users:
                 setattr(user, '_from_cache', True)
             return users, total
@@ -371,16 +551,28 @@ class UserRepository:
                 if filters.role:
                     query["role"] = filters.role
             
-            total = await User.find(query).count()
-            
             sort_direction = -1 if sort_desc else 1
-            cursor = User.find(query).sort([(sort_by, sort_direction)])
+            sort = [(sort_by, sort_direction), ("_id", sort_direction)]
+            if seek:
+                seek_filter = UserRepository._build_seek_filter(sort_by, sort_desc, *seek)
+                skip = 0
+            else:
+                seek_filter = None
+                skip = (page - 1) * size
             
-            skip = (page - 1) * size
-            users = await cursor.skip(skip).limit(size).to_list()
+            if include_total:
+                users, total = await UserRepository._find_page_with_total(
+                    query, sort, skip, size, seek_filter
+                )
+            else:
+                total = None
+                page_query = {"$and": [query, seek_filter]} if seek_filter else query
+                users = await User.find(page_query) \
+                                  .sort(sort) \
+                                  .skip(skip).limit(size).project(UserPublicView).to_list()
             
             cache_data = {
-                "users": [user.dict(exclude={"hashed_password"}) for user in users],
+                "users": [user.model_dump() for user in users],
                 "total": total
             }
             await UserRepository._set_cache(
@@ -394,7 +586,7 @@ class UserRepository:
             
         except Exception as e:
             logger.error(f"Error listing users: {e}", exc_info=True)
-            return [], 0
+            return [], (0 if include_total else None)
     
     @staticmethod
     @monitor_db_operation("user_search")
@@ -403,13 +595,13 @@ class UserRepository:
         search_term: str,
         skip: int = 0,
         limit: int = 20
-    ) -> Tuple[List[User], int]:
+    ) -> Tuple[List[UserPublicView], int]:
         cache_key = UserRepository._get_user_search_cache_key(search_term, skip, limit)
         cached_data = await UserRepository._get_from_cache(cache_key)
         
         if cached_data:
             logger.debug(f"Cache hit for user search: {search_term}")
-            users = [User.model_validate(item) for item in cached_data.get("users", [])]
+            users = [UserPublicView.model_validate(item) for item in cached_data.get("users", [])]
             total = cached_data.get("total", 0)
             for user in users:
                 setattr(user, '_from_cache', True)
@@ -431,13 +623,12 @@ class UserRepository:
                 ]
             }
             
-            total = await User.find(query).count()
-            
-            cursor = User.find(query).sort([("created_at", -1)])
-            users = await cursor.skip(skip).limit(limit).to_list()
+            users, total = await UserRepository._find_page_with_total(
+                query, [("created_at", -1)], skip, limit
+            )
             
             cache_data = {
-                "users": [user.dict(exclude={"hashed_password"}) for user in users],
+                "users": [user.model_dump() for user in users],
                 "total": total
             }
             await UserRepository._set_cache(
@@ -456,9 +647,9 @@ class UserRepository:
     
     @staticmethod
     @monitor_db_operation("user_authenticate")
-    async def authenticate_user(email: str, password: str) -> Optional[User]:
+    async def authenticate_user(email: str, password: str) -> Optional[UserAuthView]:
         try:
-            user = await UserRepository.get_user_by_email(email)
+            user = await User.find_one(User.email == email).project(UserAuthView)
             
             if not user:
                 return None
@@ -467,10 +658,12 @@ class UserRepository:
                 logger.warning(f"Failed authentication attempt for email: {email}")
                 return None
             
-            user.last_login = now_utc()
-            await user.save()
+            await User.find_one({"_id": user.id}).update({"$set": {"last_login": now_utc()}})
             
-            await UserRepository._delete_cache(UserRepository._get_user_cache_key(str(user.id)))
+            await UserRepository._delete_cache_many([
+                UserRepository._get_user_cache_key(str(user.id)),
+                UserRepository._get_user_profile_cache_key(str(user.id)),
+            ])
             
             logger.info(f"User authenticated: {email}")
             return user
@@ -483,16 +676,18 @@ class UserRepository:
     @monitor_db_operation("user_verify")
     async def verify_user(user_id: str) -> bool:
         try:
-            user = await User.get(ObjectId(user_id))
-            if not user:
+            raw = await User.get_motor_collection().find_one_and_update(
+                {"_id": ObjectId(user_id)},
+                {
+                    "$set": {"is_verified": True, "is_active": True},
+                    "$currentDate": {"verified_at": True, "updated_at": True},
+                },
+                projection={"email": 1}
+            )
+            if not raw:
                 return False
             
-            user.is_verified = True
-            user.is_active = True
-            user.verified_at = now_utc()
-            await user.save()
-            
-            await UserRepository._invalidate_user_caches(user)
+            await UserRepository._invalidate_user_cache_keys(user_id, raw["email"])
             
             logger.info(f"User verified: {user_id}")
             return True
@@ -563,17 +758,20 @@ class UserRepository:
             if not user_id:
                 return False
             
-            user = await User.get(ObjectId(user_id))
-            if not user:
+            raw = await User.get_motor_collection().find_one_and_update(
+                {"_id": ObjectId(user_id)},
+                {
+                    "$set": {"hashed_password": get_password_hash(new_password)},
+                    "$currentDate": {"updated_at": True},
+                },
+                projection={"email": 1}
+            )
+            if not raw:
                 return False
             
-            user.hashed_password=get_password_hash(new_password)
-            user.updated_at = now_utc()
-            await user.save()
-            
             token_cache_key = UserRepository._get_reset_token_cache_key(token)
             await UserRepository._delete_cache(token_cache_key)
-            await UserRepository._invalidate_user_caches(user)
+            await UserRepository._invalidate_user_cache_keys(user_id, raw["email"])
             await UserRepository._invalidate_user_sessions(user_id)
             
             logger.info(f"Password reset for user: {user_id}")
@@ -591,18 +789,31 @@ class UserRepository:
         new_password: str
     ) -> bool:
         try:
-            user = await User.get(ObjectId(user_id))
-            if not user or not user.is_active:
+            user_oid = ObjectId(user_id)
+            collection = User.get_motor_collection()
+            raw = await collection.find_one(
+                {"_id": user_oid, "is_active": True},
+                {"hashed_password": 1, "email": 1}
+            )
+            if not raw:
                 return False
             
-            if not verify_password(current_password, user.hashed_password):
+            if not verify_password(current_password, raw["hashed_password"]):
                 logger.warning(f"Password change failed for user: {user_id}")
                 return False
             
-            user.hashed_password=get_password_hash(new_password)
-            user.updated_at = now_utc()
-            await user.save()
-            await UserRepository._invalidate_user_caches(user)
+            # Matching on the old hash makes a concurrent password change lose cleanly
+            result = await collection.update_one(
+                {"_id": user_oid, "hashed_password": raw["hashed_password"]},
+                {
+                    "$set": {"hashed_password": get_password_hash(new_password)},
+                    "$currentDate": {"updated_at": True},
+                }
+            )
+            if not result.modified_count:
+                return False
+            
+            await UserRepository._invalidate_user_cache_keys(user_id, raw["email"])
             
             await UserRepository._invalidate_user_sessions(user_id)
             
@@ -617,6 +828,14 @@ class UserRepository:
     @staticmethod
     @monitor_db_operation("user_stats")
     async def get_user_statistics() -> Dict[str, Any]:
+        return await UserRepository._get_or_compute_cached(
+            UserRepository.USER_STATS_CACHE_KEY,
+            UserRepository.USER_STATS_CACHE_TTL,
+            UserRepository._compute_user_statistics
+        )
+    
+    @staticmethod
+    async def _compute_user_statistics() -> Dict[str, Any]:
         try:
             total_users = await User.find({}).count()
             active_users = await User.find({"is_active": True}).count()
@@ -663,6 +882,14 @@ class UserRepository:
     @staticmethod
     @monitor_db_operation("user_activity_stats")
     async def get_user_activity_statistics(user_id: str) -> Dict[str, Any]:
+        return await UserRepository._get_or_compute_cached(
+            UserRepository._get_user_activity_stats_cache_key(user_id),
+            UserRepository.USER_STATS_CACHE_TTL,
+            lambda: UserRepository._compute_user_activity_statistics(user_id)
+        )
+    
+    @staticmethod
+    async def _compute_user_activity_statistics(user_id: str) -> Dict[str, Any]:
         try:
             user = await User.get(ObjectId(user_id))
             if not user:
@@ -678,7 +905,7 @@ class UserRepository:
             stats = {
                 "user_id": user_id,
                 "email": user.email,
-                "username": user.username,
+                "username": getattr(user, "username", None),
                 "full_name": user.full_name,
                 "is_active": user.is_active,
                 "is_verified": user.is_verified,
@@ -688,7 +915,7 @@ class UserRepository:
                 "last_login": user.last_login.isoformat() if user.last_login else None,
                 "last_activity": last_activity.isoformat(),
                 "email_verified_at": user.verified_at.isoformat() if user.verified_at else None,
-                "phone_verified": bool(user.phone_verified_at),
+                "phone_verified": bool(getattr(user, "phone_verified_at", None)),
                 "calculated_at": datetime.now().isoformat()
             }
             
@@ -718,15 +945,16 @@ class UserRepository:
             if not update_data:
                 return 0, len(user_ids)
             
-            update_data["updated_at"] = now_utc()
-            
-            result = await User.find({"_id": {"$in": [ObjectId(uid) for uid in user_ids]}}) \
-                              .update_many({"$set": update_data})
-            
-            for user_id in user_ids:
-                await UserRepository._delete_cache(UserRepository._get_user_cache_key(user_id))
+            object_ids = [ObjectId(uid) for uid in user_ids]
+            result = await User.get_motor_collection().update_many(
+                {"_id": {"$in": object_ids}},
+                {"$set": update_data, "$currentDate": {"updated_at": True}}
+            )
             
-            await UserRepository._clear_user_list_caches()
+            await UserRepository._invalidate_bulk_caches(
+                user_ids,
+                superusers_changed="is_superuser" in update_data
+            )
             
             logger.info(f"Bulk updated {result.modified_count} users")
             return result.modified_count, len(user_ids)
@@ -743,34 +971,33 @@ class UserRepository:
                 return 0
             
             user_ids = [uid for uid in user_ids if uid != deactivated_by]
+            object_ids = {uid: ObjectId(uid) for uid in user_ids}
+            collection = User.get_motor_collection()
             
-            superuser_ids = []
-            superusers = await User.find({
-                "_id": {"$in": [ObjectId(uid) for uid in user_ids]},
-                "is_superuser": True
-            }).to_list()
+            superusers = await collection.find(
+                {"_id": {"$in": list(object_ids.values())}, "is_superuser": True},
+                {"_id": 1}
+            ).to_list(length=None)
             
-            superuser_ids = [str(user.id) for user in superusers]
+            superuser_ids = {str(doc["_id"]) for doc in superusers}
             
-            if len(superuser_ids) > 0:
-                total_superusers = await User.find({"is_superuser": True}).count()
+            if superuser_ids:
+                total_superusers = await UserRepository.get_superuser_count()
                 if total_superusers <= len(superuser_ids):
                     user_ids = [uid for uid in user_ids if uid not in superuser_ids]
             
-            update_data = {
-                "is_active": False,
-                "deactivated_at": now_utc(),
-                "deactivated_by": ObjectId(deactivated_by),
-                "updated_at": now_utc()
-            }
-            
-            result = await User.find({"_id": {"$in": [ObjectId(uid) for uid in user_ids]}}) \
-                              .update_many({"$set": update_data})
-            
-            for user_id in user_ids:
-                await UserRepository._delete_cache(UserRepository._get_user_cache_key(user_id))
+            result = await collection.update_many(
+                {"_id": {"$in": [object_ids[uid] for uid in user_ids]}},
+                {
+                    "$set": {
+                        "is_active": False,
+                        "deactivated_by": ObjectId(deactivated_by),
+                    },
+                    "$currentDate": {"deactivated_at": True, "updated_at": True},
+                }
+            )
             
-            await UserRepository._clear_user_list_caches()
+            await UserRepository._invalidate_bulk_caches(user_ids)
             
             logger.info(f"Bulk deactivated {result.modified_count} users")
             return result.modified_count
@@ -789,6 +1016,8 @@ class UserRepository:
             redis_client = get_redis()
             import json
             cached = await redis_client.get(key)
+            if cached == UserRepository.NULL_CACHE_VALUE:
+                return cached
             if cached:
                 return json.loads(cached)
         except Exception as e:
@@ -821,6 +1050,45 @@ class UserRepository:
         except Exception as e:
             logger.warning(f"Cache set error for key {key}: {e}")
     
+    @staticmethod
+    async def _get_or_compute_cached(
+        key: str,
+        ttl: int,
+        compute: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        cached = await UserRepository._get_from_cache(key)
+        if cached:
+            return cached
+        
+        # Only the worker holding the lock recomputes; the others wait for
+        # its result instead of running the same aggregation concurrently.
+        lock_key = f"{key}:lock"
+        locked = False
+        if is_redis_available():
+            try:
+                redis_client = get_redis()
+                locked = bool(await redis_client.set(
+                    lock_key, "1", nx=True, px=UserRepository.STATS_LOCK_TTL_MS
+                ))
+            except Exception as e:
+                logger.warning(f"Cache lock error for key {key}: {e}")
+            
+            if not locked:
+                for _ in range(UserRepository.STATS_LOCK_POLL_ATTEMPTS):
+                    await asyncio.sleep(UserRepository.STATS_LOCK_POLL_INTERVAL)
+                    cached = await UserRepository._get_from_cache(key)
+                    if cached:
+                        return cached
+        
+        try:
+            data = await compute()
+            if "error" not in data:
+                await UserRepository._set_cache(key, data, ttl)
+            return data
+        finally:
+            if locked:
+                await UserRepository._delete_cache(lock_key)
+    
     @staticmethod
     async def _delete_cache(key: str) -> None:
         if not is_redis_available():
@@ -832,8 +1100,52 @@ class UserRepository:
         except Exception as e:
             logger.warning(f"Cache delete error for key {key}: {e}")
     
+    @staticmethod
+    async def _delete_cache_many(keys: List[str]) -> None:
+        if not keys or not is_redis_available():
+            return
+        
+        try:
+            redis_client = get_redis()
+            await redis_client.delete(*keys)
+        except Exception as e:
+            logger.warning(f"Cache delete error for {len(keys)} keys: {e}")
+    
+    @staticmethod
+    async def _invalidate_bulk_caches(user_ids: List[str], superusers_changed: bool = False) -> None:
+        if not is_redis_available():
+            return
+        
+        keys = [UserRepository._get_user_cache_key(user_id) for user_id in user_ids]
+        keys += [UserRepository._get_user_profile_cache_key(user_id) for user_id in user_ids]
+        keys += [UserRepository._get_user_activity_stats_cache_key(user_id) for user_id in user_ids]
+        if superusers_changed:
+            keys.append(UserRepository.SUPERUSER_COUNT_CACHE_KEY)
+        
+        try:
+            redis_client = get_redis()
+            async with redis_client.pipeline(transaction=False) as pipe:
+                if keys:
+                    pipe.unlink(*keys)
+                pipe.incr(UserRepository.LIST_VERSION_KEY)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Error invalidating caches for {len(user_ids)} users: {e}")
+    
     @staticmethod
     async def _invalidate_user_caches(user: User) -> None:
+        await UserRepository._invalidate_user_cache_keys(
+            str(user.id),
+            user.email,
+            getattr(user, "username", None)
+        )
+    
+    @staticmethod
+    async def _invalidate_user_cache_keys(
+        user_id: str,
+        email: str,
+        username: Optional[str] = None
+    ) -> None:
         if not is_redis_available():
             return
         
@@ -841,19 +1153,20 @@ class UserRepository:
             redis_client = get_redis()
             
             keys_to_delete = [
-                UserRepository._get_user_cache_key(str(user.id)),
-                UserRepository._get_user_email_cache_key(user.email),
+                UserRepository._get_user_cache_key(user_id),
+                UserRepository._get_user_profile_cache_key(user_id),
+                UserRepository._get_user_activity_stats_cache_key(user_id),
+                UserRepository._get_user_email_cache_key(email),
             ]
             
-            if user.username:
-                keys_to_delete.append(UserRepository._get_user_username_cache_key(user.username))
+            if username:
+                keys_to_delete.append(UserRepository._get_user_username_cache_key(username))
             
-            if keys_to_delete:
-                await redis_client.delete(*keys_to_delete)
-                logger.debug(f"Invalidated caches for user: {user.id}")
+            await redis_client.delete(*keys_to_delete)
+            logger.debug(f"Invalidated caches for user: {user_id}")
             
         except Exception as e:
-            logger.warning(f"Error invalidating user caches for {user.id}: {e}")
+            logger.warning(f"Error invalidating user caches for {user_id}: {e}")
     
     @staticmethod
     async def _clear_user_list_caches() -> None:
@@ -891,11 +1204,20 @@ class UserRepository:
         try:
             redis_client = get_redis()
             pattern = f"{UserRepository.CACHE_PREFIX}*"
-            keys = await redis_client.keys(pattern)
-            
-            if keys:
-                await redis_client.delete(*keys)
-                logger.info(f"Cleared all user cache ({len(keys)} keys)")
+            cleared = 0
+            batch = []
+            
+            # SCAN instead of KEYS so Redis is never blocked on the whole keyspace
+            async for key in redis_client.scan_iter(match=pattern, count=500):
+                batch.append(key)
+                if len(batch) >= 500:
+                    cleared += await redis_client.unlink(*batch)
+                    batch = []
+            if batch:
+                cleared += await redis_client.unlink(*batch)
+            
+            if cleared:
+                logger.info(f"Cleared all user cache ({cleared} keys)")
             
         except Exception as e:
             logger.warning(f"Error clearing user cache: {e}")
\ No newline at end of file
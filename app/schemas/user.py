@@ -113,6 +113,13 @@ class UserRole(str, Enum):
     ADMIN = "admin"
     MANAGER = "manager"
 
+class UserSortField(str, Enum):
+    EMAIL = "email"
+    USERNAME = "username"
+    FULL_NAME = "full_name"
+    CREATED_AT = "created_at"
+    LAST_LOGIN = "last_login"
+
 class UserBulkUpdate(BaseModel):
     user_ids: List[str]
     update_data: UserUpdate
@@ -0,0 +1,20 @@
+import pytest
+
+from app.core.security import blacklist_token_local, is_token_blacklisted
+
+
+class _RedisHit:
+    async def exists(self, key):
+        return 1
+
+
+@pytest.mark.asyncio
+async def test_locally_blacklisted_token_is_blacklisted():
+    blacklist_token_local("local-token")
+
+    assert await is_token_blacklisted("local-token") is True
+
+
+@pytest.mark.asyncio
+async def test_token_found_in_redis_is_blacklisted():
+    assert await is_token_blacklisted("redis-token", redis=_RedisHit()) is True